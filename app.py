@@ -1,33 +1,164 @@
 import os
-from flask import Flask, render_template, redirect, url_for, request, session, flash, abort
+from flask import Flask, render_template, redirect, url_for, request, session, flash, abort, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import inspect, text, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
 from functools import wraps
-import secrets
+from decimal import Decimal
+import hashlib
 from werkzeug.utils import secure_filename
 import boto3
+from profiling import SamplingProfilerMiddleware
+from blob_store import create_blob_store, is_blob_key
+from autocomplete import AutocompleteIndex
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
 import uuid
+import random
+import threading
+from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your_secret_key_here')
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///capture_moments.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///capture_moments.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['CONTACT_EMAIL'] = os.environ.get('CONTACT_EMAIL', 'support@capturemoments.com')
 
 # AWS DynamoDB Configuration
 app.config['AWS_REGION'] = os.environ.get('AWS_REGION', 'ap-south-1')
 app.config['USE_AWS'] = os.environ.get('USE_AWS', 'false').lower() == 'true'
 
+# Content-addressed image storage ('local' or 's3')
+app.config['BLOB_STORE'] = os.environ.get('BLOB_STORE', 'local')
+app.config['BLOB_DIR'] = os.environ.get('BLOB_DIR', os.path.join(app.instance_path, 'blobs'))
+app.config['BLOB_BUCKET'] = os.environ.get('BLOB_BUCKET', 'capture-moments-media')
+app.config['BLOB_ENDPOINT_URL'] = os.environ.get('BLOB_ENDPOINT_URL')
+
+# Booking retention: unanswered requests expire, old bookings leave the hot tables
+app.config['PENDING_EXPIRY_DAYS'] = int(os.environ.get('PENDING_EXPIRY_DAYS', 7))
+app.config['BOOKING_ARCHIVE_DAYS'] = int(os.environ.get('BOOKING_ARCHIVE_DAYS', 365))
+app.config['ARCHIVE_DIR'] = os.environ.get('ARCHIVE_DIR', os.path.join(app.instance_path, 'archive'))
+app.config['ARCHIVE_STORE'] = os.environ.get('ARCHIVE_STORE', 'local')  # 'local' or 's3'
+app.config['ARCHIVE_BUCKET'] = os.environ.get('ARCHIVE_BUCKET', 'capture-moments-archive')
+app.config['ARCHIVE_ENDPOINT_URL'] = os.environ.get('ARCHIVE_ENDPOINT_URL')
+# DynamoDB TTL fires this long after the archive horizon, leaving maintenance time to archive first
+app.config['ARCHIVE_GRACE_DAYS'] = int(os.environ.get('ARCHIVE_GRACE_DAYS', 30))
+
+# Shared snapshot of the specialty/location autocomplete index
+app.config['AUTOCOMPLETE_SNAPSHOT'] = os.environ.get(
+    'AUTOCOMPLETE_SNAPSHOT', os.path.join(app.instance_path, 'autocomplete.json'))
+
+# Opt-in request profiling (off unless one of these is set)
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+app.config['PROFILE_ROUTES'] = [r for r in os.environ.get('PROFILE_ROUTES', '').split(',') if r]
+app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN')
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', 'profiles')
+
+# Independent backend calls of one request run in parallel, at most
+# FANOUT_PER_REQUEST at a time. The pool has room for every request thread
+# of the process (GUNICORN_THREADS, defaulted as in gunicorn.conf.py) to fan
+# out at once, so concurrent requests never queue behind each other's calls.
+app.config['FANOUT_PER_REQUEST'] = int(os.environ.get('FANOUT_PER_REQUEST', 8))
+request_threads = int(os.environ.get(
+    'GUNICORN_THREADS', 1 if os.environ.get('GUNICORN_WORKER_CLASS', 'sync') == 'sync' else 8))
+app.config['FANOUT_WORKERS'] = int(os.environ.get('FANOUT_WORKERS',
+                                                  request_threads * app.config['FANOUT_PER_REQUEST']))
+# Wait for SQLite write locks instead of failing when threaded workers overlap
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 30}}
+
 db = SQLAlchemy(app)
+blob_store = create_blob_store(app.config)
+
+if app.config['PROFILE_SAMPLE_RATE'] or app.config['PROFILE_ROUTES'] or app.config['PROFILE_TOKEN']:
+    app.wsgi_app = SamplingProfilerMiddleware(
+        app.wsgi_app,
+        app.url_map,
+        app.config['PROFILE_DIR'],
+        sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+        routes=app.config['PROFILE_ROUTES'],
+        token=app.config['PROFILE_TOKEN']
+    )
+    print(f"🔬 Request profiling enabled, writing to {app.config['PROFILE_DIR']}/")
+
+# Concurrency Helpers
+# boto3 resources are not thread-safe, so with threaded workers and fan-out
+# each thread lazily builds its own session, resource and Table objects.
+class ThreadLocalDynamoDB:
+    """Per-thread boto3 DynamoDB resource with the same interface"""
+
+    def __init__(self, region_name):
+        self.region_name = region_name
+        self.local = threading.local()
+
+    @property
+    def resource(self):
+        if not hasattr(self.local, 'resource'):
+            self.local.resource = boto3.session.Session().resource('dynamodb', region_name=self.region_name)
+            self.local.tables = {}
+        return self.local.resource
+
+    def table(self, name):
+        resource = self.resource
+        if name not in self.local.tables:
+            self.local.tables[name] = resource.Table(name)
+        return self.local.tables[name]
+
+    def Table(self, name):
+        return ThreadLocalTable(self, name)
+
+    def __getattr__(self, attr):
+        return getattr(self.resource, attr)
+
+class ThreadLocalTable:
+    """Table handle that resolves to the calling thread's boto3 Table"""
+
+    def __init__(self, dynamodb, name):
+        self.dynamodb = dynamodb
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(self.dynamodb.table(self.name), attr)
+
+fanout_executor = ThreadPoolExecutor(max_workers=app.config['FANOUT_WORKERS'], thread_name_prefix='fanout')
+
+def run_concurrently(*calls):
+    """Run independent zero-argument backend calls in parallel, returning results in order.
+
+    Calls made from inside a fan-out thread run inline so nested fan-outs
+    cannot exhaust the pool and deadlock. At most FANOUT_PER_REQUEST calls
+    are in flight at once, which keeps a request within its share of the pool.
+    """
+    if len(calls) < 2 or threading.current_thread().name.startswith('fanout'):
+        return [call() for call in calls]
+
+    def in_app_context(call):
+        with app.app_context():
+            return call()
+
+    in_flight = threading.BoundedSemaphore(app.config['FANOUT_PER_REQUEST'])
+    futures = []
+    for call in calls:
+        in_flight.acquire()
+        future = fanout_executor.submit(in_app_context, call)
+        future.add_done_callback(lambda _: in_flight.release())
+        futures.append(future)
+    return [future.result() for future in futures]
 
 # Initialize DynamoDB if AWS is enabled
 if app.config['USE_AWS']:
     try:
-        dynamodb = boto3.resource('dynamodb', region_name=app.config['AWS_REGION'])
+        dynamodb = ThreadLocalDynamoDB(app.config['AWS_REGION'])
+        dynamodb.resource
         photographers_table = dynamodb.Table('photographers')
         bookings_table = dynamodb.Table('booking')
         users_table = dynamodb.Table('users')
+        availability_table = dynamodb.Table('availability')
+        booking_stats_table = dynamodb.Table('booking_stats')
         print("✅ AWS DynamoDB connected successfully!")
     except Exception as e:
         print(f"⚠️ AWS DynamoDB connection failed: {e}")
@@ -72,8 +203,14 @@ class Booking(db.Model):
     time = db.Column(db.Time, nullable=False)
     duration = db.Column(db.Integer, nullable=False)  # in hours
     status = db.Column(db.String(50), default='pending')
+    price_per_hour = db.Column(db.Float)  # photographer's rate when booked
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    @property
+    def revenue(self):
+        """Booking value at the booked rate, so status changes move exactly what was recorded"""
+        return self.duration * self.price_per_hour
+
 class Review(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -82,6 +219,57 @@ class Review(db.Model):
     comment = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class PhotographerAvailability(db.Model):
+    """Per-photographer, per-day bitmap of booked hours (bit n set = hour n taken)"""
+    __tablename__ = 'photographer_availability'
+    # Stored as a string so SQLite ids and DynamoDB photographer_ids share one index
+    photographer_id = db.Column(db.String(64), primary_key=True)
+    date = db.Column(db.Date, primary_key=True, index=True)
+    slots = db.Column(db.Integer, nullable=False, default=0)
+
+class DailyBookingRollup(db.Model):
+    """Bookings, hours and revenue per photographer, day and status"""
+    __tablename__ = 'daily_booking_rollup'
+    photographer_id = db.Column(db.String(64), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+    hours = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+class StatusBookingRollup(db.Model):
+    """All-time bookings, hours and revenue per photographer and status"""
+    __tablename__ = 'status_booking_rollup'
+    photographer_id = db.Column(db.String(64), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+    hours = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+class ClientBookingRollup(db.Model):
+    """All-time active bookings, hours and revenue per photographer and client"""
+    __tablename__ = 'client_booking_rollup'
+    photographer_id = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.String(64), primary_key=True)
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+    hours = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+class OutboxMessage(db.Model):
+    """Notification waiting to be delivered by notification_worker.py"""
+    __tablename__ = 'outbox_message'
+    id = db.Column(db.Integer, primary_key=True)
+    dedupe_key = db.Column(db.String(128), unique=True, nullable=False)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='pending', index=True)  # pending, sent, failed
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
 # AWS DynamoDB Helper Functions
 def get_photographers_from_dynamodb():
     """Get all photographers from DynamoDB"""
@@ -94,7 +282,169 @@ def get_photographers_from_dynamodb():
         print(f"Error fetching photographers from DynamoDB: {e}")
         return []
 
-def save_booking_to_dynamodb(user_id, photographer_id, date, time, duration, status='pending'):
+def format_dynamodb_photographer(p):
+    """Convert a DynamoDB photographer item to the template-compatible format"""
+    return {
+        'id': p.get('photographer_id'),
+        'name': p.get('Name', 'Unknown'),
+        'specialty': p.get('Skills', 'General'),
+        'location': p.get('Location', 'Not specified'),
+        'price_per_hour': p.get('price_per_hour', 100.0),
+        'profile_image': p.get('Photo'),
+        'bio': p.get('Bio', ''),
+        'user_id': p.get('user_id')
+    }
+
+def get_photographer_from_dynamodb(photographer_id):
+    """Get a single photographer from DynamoDB by photographer_id"""
+    if not app.config['USE_AWS']:
+        return None
+    try:
+        response = photographers_table.get_item(Key={'photographer_id': str(photographer_id)})
+        return response.get('Item')
+    except Exception as e:
+        print(f"Error fetching photographer from DynamoDB: {e}")
+        return None
+
+def get_photographers_for_user(user_id):
+    """Photographer items owned by a user via the user_id-index GSI. Profiles
+    linked from before accounts existed (photo_00x) come before the one
+    signup creates under the user's own id, since they carry the listing."""
+    if not app.config['USE_AWS']:
+        return []
+    try:
+        response = photographers_table.query(
+            IndexName='user_id-index',
+            KeyConditionExpression=Key('user_id').eq(str(user_id))
+        )
+        items = response.get('Items', [])
+    except ClientError as e:
+        print(f"Error querying photographers by user from DynamoDB: {e}")
+        item = get_photographer_from_dynamodb(user_id)
+        items = [item] if item else []
+    return sorted(items, key=lambda p: p['photographer_id'] == str(user_id))
+
+def query_photographer_bookings(items):
+    """Bookings for every photographer item a user owns, ordered by date"""
+    results = run_concurrently(*[
+        partial(query_bookings_from_dynamodb, 'photographer_id', item['photographer_id']) for item in items
+    ])
+    return sorted((b for bookings in results for b in bookings), key=lambda b: b.get('date', ''))
+
+def query_bookings_from_dynamodb(key_name, value):
+    """Get bookings for one photographer_id or user_id via its GSI, ordered by date"""
+    if not app.config['USE_AWS']:
+        return []
+    try:
+        items = []
+        kwargs = {
+            'IndexName': f"{key_name}-date-index",
+            'KeyConditionExpression': Key(key_name).eq(str(value))
+        }
+        while True:
+            response = bookings_table.query(**kwargs)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return items
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    except Exception as e:
+        print(f"Error querying bookings from DynamoDB: {e}")
+        return []
+
+def batch_get_from_dynamodb(table_name, key_name, ids, projection):
+    """Fetch many items by primary key in batches of 100; returns {id: item}"""
+    if not app.config['USE_AWS']:
+        return {}
+    ids = list({str(i) for i in ids if i})
+    names = {f"#a{n}": attr for n, attr in enumerate(projection)}
+    found = {}
+    try:
+        for start in range(0, len(ids), 100):
+            request_items = {table_name: {
+                'Keys': [{key_name: i} for i in ids[start:start + 100]],
+                'ProjectionExpression': ', '.join(names),
+                'ExpressionAttributeNames': names
+            }}
+            attempt = 0
+            while request_items:
+                if attempt:
+                    # Unprocessed keys mean throttling; back off with jitter before retrying
+                    sleep(random.uniform(0, min(0.05 * 2 ** attempt, 2.0)))
+                response = dynamodb.batch_get_item(RequestItems=request_items)
+                for item in response.get('Responses', {}).get(table_name, []):
+                    found[item[key_name]] = item
+                request_items = response.get('UnprocessedKeys') or None
+                attempt += 1
+    except Exception as e:
+        print(f"Error batch fetching from DynamoDB table {table_name}: {e}")
+    return found
+
+def format_dynamodb_bookings(items):
+    """Convert DynamoDB booking items to template-compatible dicts, resolving
+    client and photographer names with one batch read per table"""
+    users, photographers = run_concurrently(
+        partial(batch_get_from_dynamodb, 'users', 'user_id',
+                [b.get('user_id') for b in items], ['user_id', 'username']),
+        partial(batch_get_from_dynamodb, 'photographers', 'photographer_id',
+                [b.get('photographer_id') for b in items], ['photographer_id', 'Name'])
+    )
+    return [{
+        'id': b['booking_id'],
+        'date': b.get('date'),
+        'time': b.get('time'),
+        'duration': b.get('duration'),
+        'status': b.get('status', 'pending'),
+        'user': {'username': users.get(b.get('user_id'), {}).get('username', 'Unknown')},
+        'photographer': {'name': photographers.get(b.get('photographer_id'), {}).get('Name', 'Unknown')}
+    } for b in items]
+
+def dynamodb_expires_at(booking_date):
+    """TTL (epoch seconds) after which DynamoDB deletes a booking item. Pending
+    requests are expired by maintenance.py, which also releases their slots,
+    and bookings past the archive horizon are archived and deleted by it too;
+    TTL is only the backstop, ARCHIVE_GRACE_DAYS later."""
+    expires = datetime.combine(booking_date, datetime.min.time()) + \
+        timedelta(days=app.config['BOOKING_ARCHIVE_DAYS'] + app.config['ARCHIVE_GRACE_DAYS'])
+    return int(expires.timestamp())
+
+def get_current_rates_from_dynamodb(photographer_ids):
+    """Current price_per_hour of each photographer found; returns {photographer_id: float}"""
+    photographers = batch_get_from_dynamodb('photographers', 'photographer_id', photographer_ids,
+                                            ['photographer_id', 'price_per_hour'])
+    return {pid: float(p.get('price_per_hour', 100.0)) for pid, p in photographers.items()}
+
+def dynamodb_booking_rate(item, current_rates=None):
+    """Hourly rate a booking counts at: its stored rate, or for items saved before
+    the rate was stored, the photographer's current price (from current_rates if given)"""
+    if item.get('price_per_hour') is not None:
+        return float(item['price_per_hour'])
+    if current_rates is None:
+        current_rates = get_current_rates_from_dynamodb([item['photographer_id']])
+    return current_rates.get(str(item['photographer_id']), 100.0)
+
+def dynamodb_booking_revenue(item):
+    """Booking value at dynamodb_booking_rate"""
+    return int(item['duration']) * dynamodb_booking_rate(item)
+
+def update_booking_status_in_dynamodb(booking_id, photographer_id, new_status):
+    """Move a pending booking to new_status; returns the updated item, or None
+    if it no longer belongs to the photographer or is not pending"""
+    try:
+        response = bookings_table.update_item(
+            Key={'booking_id': booking_id},
+            UpdateExpression='SET #s = :new',
+            ConditionExpression='photographer_id = :pid AND #s = :pending',
+            ExpressionAttributeNames={'#s': 'status'},
+            ExpressionAttributeValues={':new': new_status, ':pid': str(photographer_id), ':pending': 'pending'},
+            ReturnValues='ALL_NEW'
+        )
+        return response.get('Attributes')
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            print(f"Error updating booking status in DynamoDB: {e}")
+        return None
+
+def save_booking_to_dynamodb(user_id, photographer_id, date, time, duration, status='pending', price_per_hour=None):
     """Save booking to DynamoDB"""
     if not app.config['USE_AWS']:
         return None
@@ -105,11 +455,15 @@ def save_booking_to_dynamodb(user_id, photographer_id, date, time, duration, sta
             'user_id': str(user_id),
             'photographer_id': str(photographer_id),
             'date': date,
+            'month': date[:7],  # month-date-index partition, used by archival
             'time': time,
             'duration': duration,
             'status': status,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': datetime.now().isoformat(),
+            'expires_at': dynamodb_expires_at(datetime.strptime(date, '%Y-%m-%d').date())
         }
+        if price_per_hour is not None:
+            booking_item['price_per_hour'] = Decimal(str(price_per_hour))
         bookings_table.put_item(Item=booking_item)
         return booking_id
     except Exception as e:
@@ -139,6 +493,17 @@ def save_user_to_dynamodb(username, email, password_hash, is_photographer=False)
         print(f"   Email: {email}")
         return None
 
+def get_user_email_from_dynamodb(user_id):
+    """Get a user's email from DynamoDB by user_id"""
+    if not app.config['USE_AWS']:
+        return None
+    try:
+        response = users_table.get_item(Key={'user_id': str(user_id)}, ProjectionExpression='email')
+        return response.get('Item', {}).get('email')
+    except Exception as e:
+        print(f"Error fetching user email from DynamoDB: {e}")
+        return None
+
 def get_user_from_dynamodb(username):
     """Get user from DynamoDB by username"""
     if not app.config['USE_AWS']:
@@ -153,6 +518,377 @@ def get_user_from_dynamodb(username):
         print(f"Error fetching user from DynamoDB: {e}")
         return None
 
+# Availability Index
+# Each photographer/day pair holds a 24-bit integer where bit n marks hour n as
+# booked. Bookings set their bits when created and clear them when released, so
+# "who is free on date X at time Y" is a bitwise AND per row instead of a scan
+# over every booking.
+SLOTS_PER_DAY = 24
+FULL_DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+WORKING_HOURS_MASK = ((1 << 12) - 1) << 8  # 08:00 - 20:00
+ACTIVE_BOOKING_STATUSES = ('pending', 'confirmed', 'accepted')
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+ALL_WEEKDAYS_MASK = (1 << len(WEEKDAYS)) - 1
+
+def fits_in_day(start_time, duration):
+    """Whether a booking ends by midnight; the bitmaps only cover one day"""
+    return duration >= 1 and start_time.hour * 60 + start_time.minute + duration * 60 <= SLOTS_PER_DAY * 60
+
+def slot_mask(start_time, duration):
+    """Bitmap of the hours covered by a booking starting at start_time.
+
+    New bookings are checked with fits_in_day first; the clamp only matters
+    for rows stored before that check existed.
+    """
+    start = start_time.hour
+    end = start + duration + (1 if start_time.minute else 0)
+    end = min(max(end, start + 1), SLOTS_PER_DAY)
+    return ((1 << (end - start)) - 1) << start
+
+def weekday_mask(days):
+    """Bitmap of working weekdays from a list like ['Monday', 'Friday']"""
+    if not days:
+        return ALL_WEEKDAYS_MASK
+    mask = 0
+    for day in days:
+        if day in WEEKDAYS:
+            mask |= 1 << WEEKDAYS.index(day)
+    return mask
+
+def reserve_slots(photographer_id, booking_date, mask):
+    """Atomically mark hours as booked; returns False if any of them are taken.
+
+    Does not commit, so the reservation lands in the same transaction as the
+    booking row that caused it.
+    """
+    db.session.execute(
+        sqlite_insert(PhotographerAvailability)
+        .values(photographer_id=str(photographer_id), date=booking_date, slots=0)
+        .on_conflict_do_nothing()
+    )
+    result = db.session.execute(
+        update(PhotographerAvailability)
+        .where(PhotographerAvailability.photographer_id == str(photographer_id),
+               PhotographerAvailability.date == booking_date,
+               PhotographerAvailability.slots.op('&')(mask) == 0)
+        .values(slots=PhotographerAvailability.slots.op('|')(mask))
+    )
+    return result.rowcount == 1
+
+def release_slots(photographer_id, booking_date, mask):
+    """Clear booked hours, e.g. when a booking is rejected (does not commit)"""
+    db.session.execute(
+        update(PhotographerAvailability)
+        .where(PhotographerAvailability.photographer_id == str(photographer_id),
+               PhotographerAvailability.date == booking_date)
+        .values(slots=PhotographerAvailability.slots.op('&')(FULL_DAY_MASK & ~mask))
+    )
+
+def rebuild_availability_index():
+    """Recompute every bitmap from the Booking table"""
+    bitmaps = {}
+    active = Booking.query.filter(Booking.status.in_(ACTIVE_BOOKING_STATUSES)).all()
+    for b in active:
+        key = (str(b.photographer_id), b.date)
+        bitmaps[key] = bitmaps.get(key, 0) | slot_mask(b.time, b.duration)
+    PhotographerAvailability.query.delete()
+    db.session.add_all([
+        PhotographerAvailability(photographer_id=pid, date=d, slots=slots)
+        for (pid, d), slots in bitmaps.items()
+    ])
+    db.session.commit()
+    return len(bitmaps)
+
+def update_slots_in_dynamodb(photographer_id, booking_date, mask, reserve=True, retries=5):
+    """Set or clear hours in the DynamoDB availability table.
+
+    DynamoDB has no bitwise update, so this is an optimistic read-modify-write
+    guarded by a condition on the previous bitmap.
+    """
+    if not app.config['USE_AWS']:
+        return False
+    key = {'date': booking_date.isoformat(), 'photographer_id': str(photographer_id)}
+    for _ in range(retries):
+        try:
+            item = availability_table.get_item(Key=key, ConsistentRead=True).get('Item')
+            current = int(item['slots']) if item else 0
+            if reserve and current & mask:
+                return False
+            new_slots = current | mask if reserve else current & ~mask
+            if item:
+                availability_table.update_item(
+                    Key=key,
+                    UpdateExpression='SET slots = :new',
+                    ConditionExpression='slots = :old',
+                    ExpressionAttributeValues={':new': new_slots, ':old': current}
+                )
+            else:
+                # Past days are never searched, so let TTL remove them
+                expires_at = int(datetime.combine(booking_date + timedelta(days=2), datetime.min.time()).timestamp())
+                availability_table.put_item(
+                    Item=dict(key, slots=new_slots, expires_at=expires_at),
+                    ConditionExpression='attribute_not_exists(photographer_id)'
+                )
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                print(f"Error updating availability in DynamoDB: {e}")
+                return False
+    return False
+
+def get_day_bitmaps(day):
+    """Map photographer_id -> booked-hours bitmap for one day"""
+    if app.config['USE_AWS']:
+        try:
+            bitmaps = {}
+            kwargs = {'KeyConditionExpression': Key('date').eq(day.isoformat())}
+            while True:
+                response = availability_table.query(**kwargs)
+                for item in response.get('Items', []):
+                    bitmaps[item['photographer_id']] = int(item['slots'])
+                if 'LastEvaluatedKey' not in response:
+                    return bitmaps
+                kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        except Exception as e:
+            print(f"Error fetching availability from DynamoDB: {e}")
+            return {}
+    rows = db.session.query(PhotographerAvailability.photographer_id, PhotographerAvailability.slots) \
+        .filter(PhotographerAvailability.date == day).all()
+    return dict(rows)
+
+def find_available_photographers(day, start_time, duration):
+    """Photographers with every requested hour free on the given day"""
+    mask = slot_mask(start_time, duration)
+    day_bit = 1 << day.weekday()
+    bitmaps = get_day_bitmaps(day)
+    results = []
+    if app.config['USE_AWS']:
+        for p in get_photographers_from_dynamodb():
+            if bitmaps.get(p.get('photographer_id'), 0) & mask:
+                continue
+            if not weekday_mask(p.get('availability')) & day_bit:
+                continue
+            results.append({
+                'id': p.get('photographer_id'),
+                'name': p.get('Name', 'Unknown'),
+                'specialty': p.get('Skills', 'General'),
+                'location': p.get('Location', 'Not specified'),
+                'price_per_hour': float(p.get('price_per_hour', 100.0)),
+            })
+    else:
+        for p in Photographer.query.all():
+            if bitmaps.get(str(p.id), 0) & mask:
+                continue
+            results.append({
+                'id': p.id,
+                'name': p.name,
+                'specialty': p.specialty,
+                'location': p.location,
+                'price_per_hour': p.price_per_hour,
+            })
+    return results
+
+def upcoming_days(days=7):
+    today = datetime.now().date()
+    return [today + timedelta(days=i) for i in range(days)]
+
+def summarize_availability(photographers, schedule, day_bitmaps):
+    """For each photographer, the scheduled days with free working hours"""
+    availability = {}
+    for p in photographers:
+        pid = p['photographer_id']
+        working_days = weekday_mask(p.get('availability'))
+        availability[pid] = [
+            f"{WEEKDAYS[day.weekday()]} {day.isoformat()}"
+            for day, bitmaps in zip(schedule, day_bitmaps)
+            if working_days & (1 << day.weekday())
+            and bitmaps.get(pid, 0) & WORKING_HOURS_MASK != WORKING_HOURS_MASK
+        ]
+    return availability
+
+def upcoming_availability(photographers, days=7):
+    """For each photographer, the upcoming days with free working hours"""
+    schedule = upcoming_days(days)
+    day_bitmaps = run_concurrently(*[partial(get_day_bitmaps, day) for day in schedule])
+    return summarize_availability(photographers, schedule, day_bitmaps)
+
+# Booking Analytics Rollups
+# Counters are adjusted on every booking write and status change so the
+# photographer dashboard reads a handful of rollup rows instead of scanning
+# booking history. backfill_rollups.py rebuilds them from scratch.
+EARNING_STATUSES = ('confirmed', 'accepted')
+ROLLUP_FIELDS = ('bookings', 'hours', 'revenue')
+
+def _upsert_rollup(model, keys, deltas):
+    stmt = sqlite_insert(model).values(**keys, **deltas)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={field: getattr(model, field) + stmt.excluded[field] for field in deltas}
+    ))
+
+def record_booking_rollups(photographer_id, user_id, day, status, duration, revenue, sign=1):
+    """Add (sign=1) or remove (sign=-1) one booking from the rollups (does not commit)"""
+    photographer_id, user_id = str(photographer_id), str(user_id)
+    deltas = {'bookings': sign, 'hours': sign * duration, 'revenue': sign * round(revenue, 2)}
+    if app.config['USE_AWS']:
+        stat_keys = [f"day#{day.isoformat()}#{status}", f"status#{status}"]
+        if status in ACTIVE_BOOKING_STATUSES:
+            stat_keys.append(f"client#{user_id}")
+        try:
+            for stat_key in stat_keys:
+                booking_stats_table.update_item(
+                    Key={'photographer_id': photographer_id, 'stat_key': stat_key},
+                    UpdateExpression='ADD bookings :b, hours :h, revenue :r',
+                    ExpressionAttributeValues={
+                        ':b': deltas['bookings'],
+                        ':h': deltas['hours'],
+                        ':r': Decimal(str(deltas['revenue']))
+                    }
+                )
+        except Exception as e:
+            print(f"Error updating booking stats in DynamoDB: {e}")
+        return
+    _upsert_rollup(DailyBookingRollup, {'photographer_id': photographer_id, 'date': day, 'status': status}, deltas)
+    _upsert_rollup(StatusBookingRollup, {'photographer_id': photographer_id, 'status': status}, deltas)
+    if status in ACTIVE_BOOKING_STATUSES:
+        _upsert_rollup(ClientBookingRollup, {'photographer_id': photographer_id, 'user_id': user_id}, deltas)
+
+def move_booking_rollups(photographer_id, user_id, day, old_status, new_status, duration, revenue):
+    """Re-file a booking under its new status (does not commit)"""
+    record_booking_rollups(photographer_id, user_id, day, old_status, duration, revenue, sign=-1)
+    record_booking_rollups(photographer_id, user_id, day, new_status, duration, revenue)
+
+def _query_booking_stats(photographer_id, condition):
+    items = []
+    kwargs = {'KeyConditionExpression': Key('photographer_id').eq(str(photographer_id)) & condition}
+    while True:
+        response = booking_stats_table.query(**kwargs)
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return items
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def _add_rollup(totals, key, row):
+    total = totals.setdefault(key, dict.fromkeys(ROLLUP_FIELDS, 0))
+    for field in ROLLUP_FIELDS:
+        total[field] += row[field]
+
+def get_booking_analytics(*photographer_ids, weeks=8, top=5):
+    """Revenue, counts per status, weekly utilization and top clients from the
+    rollups, summed over the given photographer profiles"""
+    photographer_ids = [str(p) for p in photographer_ids]
+    today = datetime.now().date()
+    first_week = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+    last_day = first_week + timedelta(weeks=weeks, days=-1)
+    by_status, clients, daily = {}, {}, []
+    if app.config['USE_AWS']:
+        try:
+            for photographer_id in photographer_ids:
+                for i in _query_booking_stats(photographer_id, Key('stat_key').begins_with('status#')):
+                    _add_rollup(by_status, i['stat_key'].split('#', 1)[1], i)
+                daily += [(datetime.strptime(i['stat_key'].split('#')[1], '%Y-%m-%d').date(),
+                           i['stat_key'].split('#')[2], int(i['hours'])) for i in
+                          _query_booking_stats(photographer_id, Key('stat_key').between(
+                              f"day#{first_week.isoformat()}", f"day#{last_day.isoformat()}#~"))]
+                for i in _query_booking_stats(photographer_id, Key('stat_key').begins_with('client#')):
+                    _add_rollup(clients, i['stat_key'].split('#', 1)[1], i)
+            top_ids = sorted(clients, key=lambda u: clients[u]['revenue'], reverse=True)[:top]
+            users = {u: item.get('username', 'Unknown') for u, item in
+                     batch_get_from_dynamodb('users', 'user_id', top_ids, ['user_id', 'username']).items()}
+        except Exception as e:
+            print(f"Error fetching booking stats from DynamoDB: {e}")
+            by_status, daily, top_ids, users = {}, [], [], {}
+    else:
+        for r in StatusBookingRollup.query.filter(StatusBookingRollup.photographer_id.in_(photographer_ids)):
+            _add_rollup(by_status, r.status, {f: getattr(r, f) for f in ROLLUP_FIELDS})
+        daily = [(r.date, r.status, r.hours) for r in DailyBookingRollup.query.filter(
+            DailyBookingRollup.photographer_id.in_(photographer_ids),
+            DailyBookingRollup.date >= first_week,
+            DailyBookingRollup.date <= last_day)]
+        for r in ClientBookingRollup.query.filter(ClientBookingRollup.photographer_id.in_(photographer_ids)):
+            _add_rollup(clients, r.user_id, {f: getattr(r, f) for f in ROLLUP_FIELDS})
+        top_ids = sorted(clients, key=lambda u: clients[u]['revenue'], reverse=True)[:top]
+        users = {str(u.id): u.username for u in
+                 User.query.filter(User.id.in_([int(u) for u in top_ids if u.isdigit()]))}
+    top_clients = [{'username': users.get(u, 'Unknown'), 'bookings': int(clients[u]['bookings']),
+                    'revenue': float(clients[u]['revenue'])} for u in top_ids]
+
+    weekly_hours = {first_week + timedelta(weeks=w): 0 for w in range(weeks)}
+    for day, status, hours in daily:
+        if status in ACTIVE_BOOKING_STATUSES:
+            weekly_hours[day - timedelta(days=day.weekday())] += hours
+    working_hours_per_week = bin(WORKING_HOURS_MASK).count('1') * len(WEEKDAYS)
+    return {
+        'revenue': sum(float(by_status[s]['revenue']) for s in EARNING_STATUSES if s in by_status),
+        'bookings_by_status': {s: int(v['bookings']) for s, v in by_status.items() if int(v['bookings'])},
+        'weekly_utilization': [(week, hours, round(100.0 * hours / working_hours_per_week, 1))
+                               for week, hours in weekly_hours.items()],
+        'top_clients': top_clients
+    }
+
+# Autocomplete
+AUTOCOMPLETE_FIELDS = ('specialty', 'location')
+
+def load_autocomplete_values():
+    """Raw specialty and location values of every photographer; also runs on
+    the index's background rebuild thread, so it pushes its own app context"""
+    with app.app_context():
+        if app.config['USE_AWS']:
+            photographers = [format_dynamodb_photographer(p) for p in get_photographers_from_dynamodb()]
+            return {field: [p[field] for p in photographers] for field in AUTOCOMPLETE_FIELDS}
+        rows = Photographer.query.with_entities(Photographer.specialty, Photographer.location).all()
+        return {'specialty': [r.specialty for r in rows], 'location': [r.location for r in rows]}
+
+autocomplete_index = AutocompleteIndex(app.config['AUTOCOMPLETE_SNAPSHOT'], AUTOCOMPLETE_FIELDS,
+                                       load_autocomplete_values)
+
+# Notification Outbox
+# Notifications are written to outbox_message in the same transaction as the
+# change that caused them and delivered later by notification_worker.py, so
+# requests never wait on SMTP or webhooks.
+def enqueue_notification(dedupe_key, recipient, subject, body):
+    """Queue a notification (does not commit); duplicates by dedupe_key are ignored"""
+    if not recipient:
+        return
+    db.session.execute(
+        sqlite_insert(OutboxMessage)
+        .values(dedupe_key=dedupe_key, recipient=recipient, subject=subject, body=body)
+        .on_conflict_do_nothing(index_elements=['dedupe_key'])
+    )
+
+def notify_booking_change(booking, event):
+    """Queue notifications for a SQLite booking that was created, accepted, rejected or expired"""
+    client = db.session.get(User, booking.user_id)
+    photographer = db.session.get(Photographer, booking.photographer_id)
+    photographer_user = db.session.get(User, photographer.user_id) if photographer else None
+    when = f"{booking.date} at {booking.time.strftime('%H:%M')} for {booking.duration} hour(s)"
+    if event == 'created':
+        if photographer_user:
+            enqueue_notification(
+                f"booking:{booking.id}:created:photographer", photographer_user.email,
+                'New booking on Capture Moments',
+                f"{client.username if client else 'A client'} booked you on {when}."
+            )
+        if client:
+            enqueue_notification(
+                f"booking:{booking.id}:created:client", client.email,
+                'Your Capture Moments booking',
+                f"Your booking with {photographer.name if photographer else 'your photographer'} on {when} is {booking.status}."
+            )
+    elif event == 'expired' and client:
+        enqueue_notification(
+            f"booking:{booking.id}:expired:client", client.email,
+            'Your booking request expired',
+            f"Your booking request with {photographer.name if photographer else 'your photographer'} "
+            f"on {when} expired without a response."
+        )
+    elif client:
+        enqueue_notification(
+            f"booking:{booking.id}:{event}:client", client.email,
+            f"Your booking was {event}",
+            f"{photographer.name if photographer else 'Your photographer'} {event} your booking on {when}."
+        )
+
 def login_required(role=None):
     def decorator(f):
         @wraps(f)
@@ -178,6 +914,16 @@ def inject_current_year():
     from datetime import datetime
     return {'current_year': datetime.now().year}
 
+@app.template_global()
+def profile_image_url(name):
+    """URL for a profile image: blob keys go through /media, absolute URLs (the
+    DynamoDB sample data) are used as-is, older uploads live in static/img"""
+    if is_blob_key(name):
+        return url_for('media', key=name)
+    if name.startswith(('http://', 'https://', '/')):
+        return name
+    return url_for('static', filename='img/' + name)
+
 @app.route('/')
 def home():
     return render_template('index.html')
@@ -188,16 +934,7 @@ def show_photographers():
         # Get photographers from DynamoDB
         photographers = get_photographers_from_dynamodb()
         # Convert DynamoDB format to template-compatible format
-        formatted_photographers = []
-        for p in photographers:
-            formatted_photographers.append({
-                'id': p.get('photographer_id'),
-                'name': p.get('Name', 'Unknown'),
-                'specialty': p.get('Skills', 'General'),
-                'location': p.get('Location', 'Not specified'),
-                'price_per_hour': p.get('price_per_hour', 100.0),
-                'profile_image': p.get('Photo')
-            })
+        formatted_photographers = [format_dynamodb_photographer(p) for p in photographers]
     else:
         # Get photographers from SQLite
         photographers = Photographer.query.all()
@@ -216,38 +953,51 @@ def about():
 @app.route('/contact', methods=['GET', 'POST'])
 def contact():
     if request.method == 'POST':
-        # Here you would handle the form submission (e.g., send email or store message)
+        name = request.form.get('name', '')
+        email = request.form.get('email', '')
+        message = request.form.get('message', '')
+        digest = hashlib.sha256(f"{email}\n{message}".encode()).hexdigest()
+        enqueue_notification(
+            f"contact:{digest}", app.config['CONTACT_EMAIL'],
+            f"Contact form message from {name}",
+            f"From: {name} <{email}>\n\n{message}"
+        )
+        db.session.commit()
         flash('Thank you for contacting us! We will get back to you soon.', 'success')
         return redirect(url_for('contact'))
     return render_template('contact.html')
 
 @app.route('/profile/<int:photographer_id>')
+@app.route('/profile/<photographer_id>')
 def profile(photographer_id):
-    photographer = Photographer.query.get_or_404(photographer_id)
+    if app.config['USE_AWS']:
+        item = get_photographer_from_dynamodb(photographer_id)
+        if not item:
+            abort(404)
+        photographer = format_dynamodb_photographer(item)
+    else:
+        photographer = Photographer.query.get_or_404(photographer_id)
     return render_template('profile.html', photographer=photographer)
 
 @app.route('/booking/<int:photographer_id>', methods=['GET', 'POST'])
+@app.route('/booking/<photographer_id>', methods=['GET', 'POST'])
 def booking(photographer_id):
+    # The booking page also shows this week's free days
+    schedule = upcoming_days() if request.method == 'GET' else []
     if app.config['USE_AWS']:
-        # Get photographer from DynamoDB
-        photographers = get_photographers_from_dynamodb()
-        photographer = None
-        for p in photographers:
-            if p.get('photographer_id') == str(photographer_id):
-                photographer = {
-                    'id': p.get('photographer_id'),
-                    'name': p.get('Name', 'Unknown'),
-                    'specialty': p.get('Skills', 'General'),
-                    'location': p.get('Location', 'Not specified'),
-                    'price_per_hour': p.get('price_per_hour', 100.0),
-                    'profile_image': p.get('Photo')
-                }
-                break
-        if not photographer:
+        # Get photographer from DynamoDB, reading availability alongside it
+        item, *day_bitmaps = run_concurrently(
+            partial(get_photographer_from_dynamodb, photographer_id),
+            *[partial(get_day_bitmaps, day) for day in schedule]
+        )
+        if not item:
             abort(404)
+        photographer = format_dynamodb_photographer(item)
     else:
         # Get photographer from SQLite
         photographer = Photographer.query.get_or_404(photographer_id)
+        item = {'photographer_id': str(photographer.id)}
+        day_bitmaps = [get_day_bitmaps(day) for day in schedule]
     
     if request.method == 'POST':
         if 'user_id' not in session:
@@ -257,8 +1007,17 @@ def booking(photographer_id):
         date = request.form['date']
         time = request.form['time']
         duration = int(request.form['duration'])
+        booking_date = datetime.strptime(date, '%Y-%m-%d').date()
+        booking_time = datetime.strptime(time, '%H:%M').time()
+        if not fits_in_day(booking_time, duration):
+            flash('Bookings must start and end on the same day.', 'warning')
+            return redirect(url_for('booking', photographer_id=photographer_id))
+        mask = slot_mask(booking_time, duration)
         
         if app.config['USE_AWS']:
+            if not update_slots_in_dynamodb(photographer_id, booking_date, mask):
+                flash('The photographer is not available at that time.', 'warning')
+                return redirect(url_for('booking', photographer_id=photographer_id))
             # Save to DynamoDB
             booking_id = save_booking_to_dynamodb(
                 session['user_id'], 
@@ -266,39 +1025,75 @@ def booking(photographer_id):
                 date, 
                 time, 
                 duration, 
-                'confirmed'
+                'confirmed',
+                photographer['price_per_hour']
             )
             if booking_id:
+                record_booking_rollups(photographer_id, session['user_id'], booking_date, 'confirmed',
+                                       duration, duration * float(photographer['price_per_hour']))
+                users = batch_get_from_dynamodb('users', 'user_id', [session['user_id'], photographer['user_id']],
+                                                ['user_id', 'username', 'email'])
+                client = users.get(str(session['user_id']), {})
+                when = f"{date} at {time} for {duration} hour(s)"
+                enqueue_notification(
+                    f"booking:{booking_id}:created:photographer",
+                    users.get(str(photographer['user_id']), {}).get('email'),
+                    'New booking on Capture Moments',
+                    f"{client.get('username', 'A client')} booked you on {when}."
+                )
+                enqueue_notification(
+                    f"booking:{booking_id}:created:client", client.get('email'),
+                    'Your Capture Moments booking',
+                    f"Your booking with {photographer['name']} on {when} is confirmed."
+                )
+                db.session.commit()
                 flash('Booking successful!', 'success')
             else:
+                update_slots_in_dynamodb(photographer_id, booking_date, mask, reserve=False)
                 flash('Booking failed. Please try again.', 'danger')
         else:
+            if not reserve_slots(photographer.id, booking_date, mask):
+                db.session.rollback()
+                flash('The photographer is not available at that time.', 'warning')
+                return redirect(url_for('booking', photographer_id=photographer_id))
             # Save to SQLite
             booking = Booking(
                 user_id=session['user_id'],
                 photographer_id=photographer.id,
-                date=datetime.strptime(date, '%Y-%m-%d').date(),
-                time=datetime.strptime(time, '%H:%M').time(),
+                date=booking_date,
+                time=booking_time,
                 duration=duration,
-                status='confirmed'
+                status='confirmed',
+                price_per_hour=photographer.price_per_hour
             )
             db.session.add(booking)
+            db.session.flush()
+            record_booking_rollups(photographer.id, booking.user_id, booking_date, booking.status,
+                                   duration, booking.revenue)
+            notify_booking_change(booking, 'created')
             db.session.commit()
             flash('Booking successful!', 'success')
         
         return redirect(url_for('client_dashboard'))
     
-    return render_template('booking.html', photographer=photographer, booking=None)
+    availability = summarize_availability([item], schedule, day_bitmaps)[item['photographer_id']]
+    return render_template('booking.html', photographer=photographer, booking=None, availability=availability)
 
 @app.route('/booking/<int:booking_id>/accept', methods=['POST'])
+@app.route('/booking/<booking_id>/accept', methods=['POST'])
 @login_required(role='photographer')
 def accept_booking(booking_id):
-    booking = Booking.query.get_or_404(booking_id)
+    if app.config['USE_AWS']:
+        return change_booking_status_in_dynamodb(booking_id, 'accepted')
+    booking =  Booking.query.get_or_404(booking_id)
     photographer = Photographer.query.filter_by(user_id=session['user_id']).first()
     if not photographer or booking.photographer_id != photographer.id:
         abort(403)
     if booking.status == 'pending':
+        move_booking_rollups(booking.photographer_id, booking.user_id, booking.date, booking.status, 'accepted',
+                             booking.duration, booking.revenue)
         booking.status = 'accepted'
+        notify_booking_change(booking, 'accepted')
         db.session.commit()
         flash('Booking accepted.', 'success')
     else:
@@ -306,48 +1101,131 @@ def accept_booking(booking_id):
     return redirect(url_for('photographer_dashboard'))
 
 @app.route('/booking/<int:booking_id>/reject', methods=['POST'])
+@app.route('/booking/<booking_id>/reject', methods=['POST'])
 @login_required(role='photographer')
 def reject_booking(booking_id):
+    if app.config['USE_AWS']:
+        return change_booking_status_in_dynamodb(booking_id, 'rejected')
     booking = Booking.query.get_or_404(booking_id)
     photographer = Photographer.query.filter_by(user_id=session['user_id']).first()
     if not photographer or booking.photographer_id != photographer.id:
         abort(403)
     if booking.status == 'pending':
+        move_booking_rollups(booking.photographer_id, booking.user_id, booking.date, booking.status, 'rejected',
+                             booking.duration, booking.revenue)
         booking.status = 'rejected'
+        release_slots(booking.photographer_id, booking.date, slot_mask(booking.time, booking.duration))
+        notify_booking_change(booking, 'rejected')
         db.session.commit()
         flash('Booking rejected.', 'info')
     else:
         flash('Booking cannot be rejected.', 'warning')
     return redirect(url_for('photographer_dashboard'))
 
+def change_booking_status_in_dynamodb(booking_id, new_status):
+    """Shared DynamoDB path for accept_booking and reject_booking"""
+    try:
+        booking = bookings_table.get_item(Key={'booking_id': str(booking_id)}).get('Item')
+    except ClientError as e:
+        print(f"Error fetching booking from DynamoDB: {e}")
+        flash('Could not load the booking. Please try again.', 'danger')
+        return redirect(url_for('photographer_dashboard'))
+    if not booking:
+        abort(404)
+    owned = {p['photographer_id'] for p in get_photographers_for_user(session['user_id'])}
+    if booking.get('photographer_id') not in owned:
+        abort(403)
+    updated = update_booking_status_in_dynamodb(str(booking_id), booking['photographer_id'], new_status)
+    if not updated:
+        flash(f"Booking cannot be {new_status}.", 'warning')
+        return redirect(url_for('photographer_dashboard'))
+    booking_date = datetime.strptime(updated['date'], '%Y-%m-%d').date()
+    duration = int(updated['duration'])
+    move_booking_rollups(updated['photographer_id'], updated['user_id'], booking_date, 'pending',
+                         new_status, duration, dynamodb_booking_revenue(updated))
+    if new_status == 'rejected':
+        booking_time = datetime.strptime(updated['time'], '%H:%M').time()
+        update_slots_in_dynamodb(updated['photographer_id'], booking_date,
+                                 slot_mask(booking_time, duration), reserve=False)
+    enqueue_notification(
+        f"booking:{booking_id}:{new_status}:client", get_user_email_from_dynamodb(updated['user_id']),
+        f"Your booking was {new_status}",
+        f"{session.get('username', 'Your photographer')} {new_status} your booking on {updated['date']} at {updated['time']}."
+    )
+    db.session.commit()
+    flash(f"Booking {new_status}.", 'success' if new_status == 'accepted' else 'info')
+    return redirect(url_for('photographer_dashboard'))
+
 @app.route('/edit_profile', methods=['GET', 'POST'])
 @login_required(role='photographer')
 def edit_profile():
+    if app.config['USE_AWS']:
+        return edit_profile_in_dynamodb()
     photographer = Photographer.query.filter_by(user_id=session['user_id']).first()
     if not photographer:
         flash('Photographer profile not found.', 'danger')
         return redirect(url_for('photographer_dashboard'))
     if request.method == 'POST':
+        old_values = {field: getattr(photographer, field) for field in AUTOCOMPLETE_FIELDS}
         photographer.name = request.form['name']
-        photographer.specialty = request.form['specialty']
-        photographer.location = request.form['location']
+        photographer.specialty = autocomplete_index.canonical('specialty', request.form['specialty'])
+        photographer.location = autocomplete_index.canonical('location', request.form['location'])
         photographer.price_per_hour = float(request.form['price_per_hour'])
         photographer.bio = request.form['bio']
         # Handle profile image upload
-        if 'profile_image' in request.files:
-            file = request.files['profile_image']
-            if file and file.filename:
-                filename = secure_filename(file.filename)
-                unique_name = secrets.token_hex(8) + '_' + filename
-                img_dir = os.path.join('static', 'img')
-                os.makedirs(img_dir, exist_ok=True)
-                file.save(os.path.join(img_dir, unique_name))
-                photographer.profile_image = unique_name
+        unique_name = save_uploaded_profile_image()
+        if unique_name:
+            photographer.profile_image = unique_name
         db.session.commit()
+        for field in AUTOCOMPLETE_FIELDS:
+            autocomplete_index.replace(field, old_values[field], getattr(photographer, field))
         flash('Profile updated successfully!', 'success')
         return redirect(url_for('photographer_dashboard'))
     return render_template('edit_profile.html', photographer=photographer)
 
+def save_uploaded_profile_image():
+    """Store the uploaded profile_image in the blob store, returning its key (or None)"""
+    if 'profile_image' in request.files:
+        file = request.files['profile_image']
+        if file and file.filename:
+            return blob_store.put(file.read(), secure_filename(file.filename))
+    return None
+
+def edit_profile_in_dynamodb():
+    """DynamoDB path for edit_profile"""
+    profiles = get_photographers_for_user(session['user_id'])
+    item = profiles[0] if profiles else None
+    if not item:
+        flash('Photographer profile not found.', 'danger')
+        return redirect(url_for('photographer_dashboard'))
+    if request.method == 'POST':
+        updates = {
+            'Name': request.form['name'],
+            'Skills': autocomplete_index.canonical('specialty', request.form['specialty']),
+            'Location': autocomplete_index.canonical('location', request.form['location']),
+            'price_per_hour': Decimal(request.form['price_per_hour']),
+            'Bio': request.form['bio']
+        }
+        unique_name = save_uploaded_profile_image()
+        if unique_name:
+            updates['Photo'] = unique_name
+        names = {f"#a{n}": attr for n, attr in enumerate(updates)}
+        try:
+            photographers_table.update_item(
+                Key={'photographer_id': item['photographer_id']},
+                UpdateExpression='SET ' + ', '.join(f"{name} = :v{name[2:]}" for name in names),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues={f":v{n}": value for n, value in enumerate(updates.values())}
+            )
+            autocomplete_index.replace('specialty', item.get('Skills'), updates['Skills'])
+            autocomplete_index.replace('location', item.get('Location'), updates['Location'])
+            flash('Profile updated successfully!', 'success')
+        except Exception as e:
+            print(f"Error updating photographer in DynamoDB: {e}")
+            flash('Profile update failed. Please try again.', 'danger')
+        return redirect(url_for('photographer_dashboard'))
+    return render_template('edit_profile.html', photographer=format_dynamodb_photographer(item))
+
 @app.route('/signup', methods=['GET', 'POST'])
 def signup():
     if request.method == 'POST':
@@ -368,6 +1246,15 @@ def signup():
                 # Create user in DynamoDB
                 password_hash = generate_password_hash(password)
                 user_id = save_user_to_dynamodb(username, email, password_hash, is_photographer)
+                if user_id and is_photographer:
+                    # Keyed by the user's id so dashboards can get_item it directly
+                    photographers_table.put_item(Item={
+                        'photographer_id': user_id,
+                        'user_id': user_id,
+                        'Name': username,
+                        'price_per_hour': Decimal('100.0'),
+                        'availability': []
+                    })
                 
                 if user_id:
                     flash('Account created successfully! Please log in.', 'success')
@@ -442,13 +1329,34 @@ def logout():
 @app.route('/dashboard/photographer')
 @login_required(role='photographer')
 def photographer_dashboard():
+    if app.config['USE_AWS']:
+        profiles = get_photographers_for_user(session['user_id'])
+        if not profiles:
+            return render_template('photographer_dashboard.html', photographer=None, bookings=[], analytics=None)
+        # Bookings and analytics cover every profile the user owns
+        booking_items, analytics = run_concurrently(
+            partial(query_photographer_bookings, profiles),
+            partial(get_booking_analytics, *[p['photographer_id'] for p in profiles])
+        )
+        return render_template('photographer_dashboard.html', photographer=format_dynamodb_photographer(profiles[0]),
+                               bookings=format_dynamodb_bookings(booking_items), analytics=analytics)
     photographer = Photographer.query.filter_by(user_id=session['user_id']).first()
     bookings = Booking.query.filter_by(photographer_id=photographer.id).all() if photographer else []
-    return render_template('photographer_dashboard.html', photographer=photographer, bookings=bookings)
+    analytics = get_booking_analytics(photographer.id) if photographer else None
+    return render_template('photographer_dashboard.html', photographer=photographer, bookings=bookings,
+                           analytics=analytics)
 
 @app.route('/dashboard/client')
 @login_required(role='client')
 def client_dashboard():
+    if app.config['USE_AWS']:
+        photographer_items, booking_items = run_concurrently(
+            get_photographers_from_dynamodb,
+            partial(query_bookings_from_dynamodb, 'user_id', session['user_id'])
+        )
+        photographers = [format_dynamodb_photographer(p) for p in photographer_items]
+        my_bookings = format_dynamodb_bookings(booking_items)
+        return render_template('client_dashboard.html', photographers=photographers, my_bookings=my_bookings)
     photographers = Photographer.query.all()
     my_bookings = Booking.query.filter_by(user_id=session['user_id']).all()
     return render_template('client_dashboard.html', photographers=photographers, my_bookings=my_bookings)
@@ -456,6 +1364,12 @@ def client_dashboard():
 @app.route('/my_bookings')
 @login_required()
 def my_bookings():
+    if app.config['USE_AWS']:
+        if session.get('is_photographer'):
+            booking_items = query_photographer_bookings(get_photographers_for_user(session['user_id']))
+        else:
+            booking_items = query_bookings_from_dynamodb('user_id', session['user_id'])
+        return render_template('my_bookings.html', bookings=format_dynamodb_bookings(booking_items))
     if session.get('is_photographer'):
         photographer = Photographer.query.filter_by(user_id=session['user_id']).first()
         bookings = Booking.query.filter_by(photographer_id=photographer.id).all() if photographer else []
@@ -463,6 +1377,37 @@ def my_bookings():
         bookings = Booking.query.filter_by(user_id=session['user_id']).all()
     return render_template('my_bookings.html', bookings=bookings)
 
+@app.route('/media/<key>')
+def media(key):
+    if not is_blob_key(key):
+        abort(404)
+    return blob_store.send(key)
+
+@app.route('/autocomplete/<field>')
+def autocomplete(field):
+    """Most common specialty/location values starting with ?q="""
+    if field not in AUTOCOMPLETE_FIELDS:
+        abort(404)
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    return jsonify(autocomplete_index.search(field, request.args.get('q', ''), limit))
+
+@app.route('/availability/search')
+def availability_search():
+    """Photographers free on ?date=YYYY-MM-DD&time=HH:MM&duration=hours"""
+    try:
+        day = datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+        start_time = datetime.strptime(request.args.get('time', '09:00'), '%H:%M').time()
+        duration = int(request.args.get('duration', 1))
+    except (KeyError, ValueError):
+        return jsonify({'error': 'date (YYYY-MM-DD), time (HH:MM) and duration (hours) are required'}), 400
+    if duration < 1:
+        return jsonify({'error': 'duration must be at least 1 hour'}), 400
+    if not fits_in_day(start_time, duration):
+        return jsonify({'error': 'bookings must end by midnight'}), 400
+    photographers = find_available_photographers(day, start_time, duration)
+    return jsonify({'date': day.isoformat(), 'time': start_time.strftime('%H:%M'),
+                    'duration': duration, 'photographers': photographers})
+
 # AWS Integration Routes (similar to awsint.py)
 @app.route('/aws/book', methods=['GET', 'POST'])
 def aws_book():
@@ -498,9 +1443,7 @@ def aws_show_photographers():
     """AWS-specific photographers route"""
     if app.config['USE_AWS']:
         photographers = get_photographers_from_dynamodb()
-        availability_data = {
-            p['photographer_id']: p.get('availability', []) for p in photographers
-        }
+        availability_data = upcoming_availability(photographers)
         return render_template('photographers.html',
                                photographers=photographers,
                                availability_data=availability_data)
@@ -510,7 +1453,22 @@ def aws_show_photographers():
 
 # --- TEMPORARY: Create all tables if they do not exist ---
 with app.app_context():
+    # WAL lets threaded workers read while another thread writes (persists in the db file)
+    db.session.execute(text('PRAGMA journal_mode=WAL'))
     db.create_all()
+    # Bookings made before the booked rate was stored take the photographer's current one
+    if 'price_per_hour' not in {c['name'] for c in inspect(db.engine).get_columns('booking')}:
+        db.session.execute(text('ALTER TABLE booking ADD COLUMN price_per_hour FLOAT'))
+    db.session.execute(text(
+        'UPDATE booking SET price_per_hour = (SELECT price_per_hour FROM photographer '
+        'WHERE photographer.id = booking.photographer_id) WHERE price_per_hour IS NULL'))
+    db.session.commit()
+    if not PhotographerAvailability.query.first() and Booking.query.first():
+        rebuild_availability_index()
+    if not os.path.exists(app.config['AUTOCOMPLETE_SNAPSHOT']):
+        autocomplete_index.rebuild()
+    if not app.config['USE_AWS'] and not StatusBookingRollup.query.first() and Booking.query.first():
+        print("📈 Booking analytics rollups are empty, run: python backfill_rollups.py")
 # --- End TEMPORARY ---
 
 if __name__ == '__main__':
@@ -0,0 +1,109 @@
+"""
+Booking Archive Storage for Capture Moments
+Archived bookings are gzipped JSON lines, partitioned by booking month:
+
+    bookings/YYYY-MM/<part>.jsonl.gz
+
+Each maintenance run writes a new part per month instead of appending, so
+the same layout works on local disk and in S3, and a part is either
+complete or absent. Readers drop duplicate records (same id and created_at),
+which only appear if a run crashed between writing a part and deleting the
+archived rows.
+
+Backends:
+  LocalArchiveStore - files under ARCHIVE_DIR
+  S3ArchiveStore    - objects in ARCHIVE_BUCKET, for DynamoDB deployments
+"""
+
+import gzip
+import json
+import os
+import re
+import tempfile
+import uuid
+from datetime import datetime
+
+import boto3
+
+MONTH_RE = re.compile(r'^\d{4}-\d{2}$')
+
+def encode_part(records):
+    return gzip.compress(''.join(json.dumps(r, separators=(',', ':')) + '\n' for r in records).encode())
+
+def decode_part(data):
+    return [json.loads(line) for line in gzip.decompress(data).decode().splitlines() if line]
+
+def part_name():
+    """Sortable, collision-free name for a new part"""
+    return f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.jsonl.gz"
+
+class LocalArchiveStore:
+    """Partitions as files under root/bookings"""
+
+    def __init__(self, root):
+        self.root = os.path.join(root, 'bookings')
+
+    def write(self, month, records):
+        """Write records as a new part of month, synced before returning"""
+        directory = os.path.join(self.root, month)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(encode_part(records))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(directory, part_name()))
+
+    def months(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if MONTH_RE.match(name) and os.path.isdir(os.path.join(self.root, name)))
+
+    def read(self, month):
+        """Every record archived for month"""
+        directory = os.path.join(self.root, month)
+        if not os.path.isdir(directory):
+            return
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.jsonl.gz'):
+                with open(os.path.join(directory, name), 'rb') as f:
+                    yield from decode_part(f.read())
+
+class S3ArchiveStore:
+    """Partitions as objects under prefix/bookings in an S3-compatible bucket"""
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region_name=None):
+        self.bucket = bucket
+        self.prefix = prefix + 'bookings/'
+        self.client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region_name)
+
+    def write(self, month, records):
+        """Write records as a new part of month"""
+        self.client.put_object(Bucket=self.bucket, Key=f"{self.prefix}{month}/{part_name()}",
+                               Body=encode_part(records), ContentType='application/gzip')
+
+    def months(self):
+        paginator = self.client.get_paginator('list_objects_v2')
+        months = set()
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix, Delimiter='/'):
+            for common in page.get('CommonPrefixes', []):
+                month = common['Prefix'][len(self.prefix):].rstrip('/')
+                if MONTH_RE.match(month):
+                    months.add(month)
+        return sorted(months)
+
+    def read(self, month):
+        """Every record archived for month"""
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=f"{self.prefix}{month}/"):
+            for obj in sorted(page.get('Contents', []), key=lambda o: o['Key']):
+                body = self.client.get_object(Bucket=self.bucket, Key=obj['Key'])['Body'].read()
+                yield from decode_part(body)
+
+def create_archive_store(config):
+    """Build the backend selected by ARCHIVE_STORE ('local' or 's3')"""
+    if config['ARCHIVE_STORE'] == 's3':
+        return S3ArchiveStore(config['ARCHIVE_BUCKET'], endpoint_url=config['ARCHIVE_ENDPOINT_URL'],
+                              region_name=config['AWS_REGION'])
+    return LocalArchiveStore(config['ARCHIVE_DIR'])
@@ -0,0 +1,200 @@
+"""
+Prefix Autocomplete for Capture Moments
+Keeps the distinct, normalized specialty and location values in memory as
+sorted arrays so a keystroke lookup is a bisect plus a small top-k, with no
+database access. Every worker shares the index through a compact JSON
+snapshot file: writers merge their change into the latest snapshot under a
+file lock, and readers reload it when its mtime moves. A stale snapshot is
+rebuilt from the database on a background thread; lookups never wait on it.
+"""
+
+import bisect
+import fcntl
+import heapq
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_SIZE = 1024  # most recently used (prefix, limit) results kept per index
+
+def normalize(value):
+    """Lookup key for a value: trimmed, single-spaced, case-folded"""
+    return re.sub(r'\s+', ' ', value or '').strip().casefold()
+
+def split_values(value):
+    """Individual entries of a comma-separated field like 'Portrait, Wedding'"""
+    return [part for part in (re.sub(r'\s+', ' ', p).strip() for p in (value or '').split(',')) if part]
+
+class PrefixIndex:
+    """Sorted array of normalized values with display forms and frequencies"""
+
+    def __init__(self, entries=()):
+        # entries: iterable of (key, display, count)
+        self.counts = {}
+        self.display = {}
+        for key, display, count in entries:
+            self.counts[key] = count
+            self.display[key] = display
+        self.keys = sorted(self.counts)
+        self.cache = OrderedDict()
+
+    def add(self, value, delta=1):
+        key = normalize(value)
+        if not key:
+            return
+        count = self.counts.get(key, 0) + delta
+        if count > 0:
+            if key not in self.counts:
+                bisect.insort(self.keys, key)
+                self.display[key] = value
+            self.counts[key] = count
+        elif key in self.counts:
+            del self.counts[key]
+            del self.display[key]
+            self.keys.pop(bisect.bisect_left(self.keys, key))
+        self.cache.clear()
+
+    def canonical(self, value):
+        """Existing display form for value, or value itself if unseen"""
+        return self.display.get(normalize(value), value)
+
+    def search(self, prefix, limit=10):
+        """Most frequent values starting with prefix"""
+        prefix = normalize(prefix)
+        cache_key = (prefix, limit)
+        if cache_key in self.cache:
+            self.cache.move_to_end(cache_key)
+            return self.cache[cache_key]
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + '\uffff')
+        best = heapq.nsmallest(limit, self.keys[start:end], key=lambda k: (-self.counts[k], k))
+        results = [{'value': self.display[k], 'count': self.counts[k]} for k in best]
+        # Prefixes come straight from user input, so keep only the recent ones
+        self.cache[cache_key] = results
+        if len(self.cache) > CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return results
+
+    def to_list(self):
+        return [[key, self.display[key], self.counts[key]] for key in self.keys]
+
+class AutocompleteIndex:
+    """Prefix indexes for several fields, shared between processes via a snapshot file"""
+
+    def __init__(self, snapshot_path, fields, load_values, check_interval=2.0, max_age=3600):
+        self.snapshot_path = snapshot_path
+        self.fields = fields
+        self.load_values = load_values  # () -> {field: [raw value, ...]} from the database
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self.indexes = None
+        self.snapshot_mtime = None
+        self.checked_at = 0.0
+        self.rebuilding = False
+        self.lock = threading.RLock()
+
+    def _file_lock(self):
+        os.makedirs(os.path.dirname(self.snapshot_path) or '.', exist_ok=True)
+        lock_file = open(self.snapshot_path + '.lock', 'w')
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    def _read_snapshot(self):
+        with open(self.snapshot_path) as f:
+            data = json.load(f)
+        self.indexes = {field: PrefixIndex(data.get(field, [])) for field in self.fields}
+        self.snapshot_mtime = os.path.getmtime(self.snapshot_path)
+
+    def _write_snapshot(self):
+        data = {field: index.to_list() for field, index in self.indexes.items()}
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.snapshot_path) or '.')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, self.snapshot_path)
+        self.snapshot_mtime = os.path.getmtime(self.snapshot_path)
+
+    def rebuild(self):
+        """Recompute every index from the database and publish a new snapshot.
+        The database read and sort happen before taking the lock, so lookups
+        keep using the current indexes until the new ones are swapped in."""
+        values = self.load_values()
+        indexes = {field: PrefixIndex() for field in self.fields}
+        for field in self.fields:
+            for raw in values.get(field, []):
+                for value in split_values(raw):
+                    indexes[field].add(value)
+        with self.lock:
+            lock_file = self._file_lock()
+            try:
+                self.indexes = indexes
+                self._write_snapshot()
+            finally:
+                lock_file.close()
+
+    def rebuild_in_background(self):
+        """Start a rebuild on a daemon thread unless one is already running"""
+        with self.lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+
+        def run():
+            try:
+                self.rebuild()
+            except Exception as e:
+                print(f"Error rebuilding autocomplete index: {e}")
+            finally:
+                self.rebuilding = False
+
+        threading.Thread(target=run, name='autocomplete-rebuild', daemon=True).start()
+
+    def _refresh(self):
+        """Load the shared snapshot if another worker published a newer one,
+        and schedule a rebuild if it is missing or older than max_age"""
+        now = time.monotonic()
+        if self.indexes is not None and now - self.checked_at < self.check_interval:
+            return
+        self.checked_at = now
+        try:
+            mtime = os.path.getmtime(self.snapshot_path)
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime != self.snapshot_mtime:
+            self._read_snapshot()
+        elif self.indexes is None:
+            # Nothing published yet; serve empty results until the rebuild lands
+            self.indexes = {field: PrefixIndex() for field in self.fields}
+        if mtime is None or time.time() - mtime > self.max_age:
+            self.rebuild_in_background()
+
+    def search(self, field, prefix, limit=10):
+        with self.lock:
+            self._refresh()
+            return self.indexes[field].search(prefix, limit)
+
+    def canonical(self, field, raw):
+        """Rewrite a comma-separated value using the existing spelling of each entry"""
+        with self.lock:
+            self._refresh()
+            return ', '.join(self.indexes[field].canonical(v) for v in split_values(raw))
+
+    def replace(self, field, old_raw, new_raw):
+        """Apply one record's change (old value out, new value in) and publish it"""
+        with self.lock:
+            lock_file = self._file_lock()
+            try:
+                if os.path.exists(self.snapshot_path):
+                    self._read_snapshot()
+                elif self.indexes is None:
+                    self.indexes = {f: PrefixIndex() for f in self.fields}
+                for value in split_values(old_raw):
+                    self.indexes[field].add(value, -1)
+                for value in split_values(new_raw):
+                    self.indexes[field].add(value)
+                self._write_snapshot()
+            finally:
+                lock_file.close()
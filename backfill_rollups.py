@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Booking Rollup Backfill for Capture Moments
+Rebuilds the analytics rollups that app.py maintains incrementally.
+
+Aggregates are computed set-at-a-time with GROUP BY queries, either over the
+SQLite Booking table or over DynamoDB bookings loaded into an in-memory
+SQLite table. In USE_AWS mode those are scanned from the 'booking' table,
+or read from an exported booking file (JSON lines) if one is given.
+Bookings maintenance.py moved to the archive are loaded alongside them, so a
+rebuild keeps counting history that is no longer in the hot table. Bookings
+stored without a rate count at the photographer's current price, the same
+rule the incremental updates follow.
+In USE_AWS mode the results are written to the DynamoDB booking_stats table,
+otherwise they replace the SQLite rollup tables.
+
+Usage:
+    python backfill_rollups.py
+    python backfill_rollups.py --export bookings.jsonl
+"""
+
+import argparse
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from boto3.dynamodb.conditions import Attr
+from sqlalchemy import create_engine, insert, text
+
+import app as capture_moments
+from app import (app, db, ACTIVE_BOOKING_STATUSES, DailyBookingRollup, StatusBookingRollup, ClientBookingRollup,
+                 Photographer, dynamodb_booking_rate)
+from maintenance import query_archive
+
+# Archived rows still present in booking are duplicates left by an interrupted
+# archive run. SQLite reuses the ids of archived rows, so a live row is only the
+# same booking if its created_at matches too. Archives written before the
+# booked rate was kept use the current one.
+SQLITE_SOURCE = """
+    SELECT CAST(b.photographer_id AS TEXT) AS photographer_id,
+           CAST(b.user_id AS TEXT) AS user_id,
+           b.date AS date, b.status AS status, b.duration AS duration,
+           COALESCE(b.price_per_hour, p.price_per_hour) AS price_per_hour
+    FROM booking b JOIN photographer p ON p.id = b.photographer_id
+    UNION ALL
+    SELECT a.photographer_id, a.user_id, a.date, a.status, a.duration,
+           COALESCE(a.price_per_hour, p.price_per_hour, 100.0)
+    FROM archived_booking a LEFT JOIN photographer p ON CAST(p.id AS TEXT) = a.photographer_id
+    WHERE NOT EXISTS (SELECT 1 FROM booking b WHERE CAST(b.id AS TEXT) = a.id
+                      AND julianday(b.created_at) IS julianday(a.created_at))
+"""
+
+def aggregate(connection, source):
+    """Run the rollup GROUP BY queries over a booking source subquery"""
+    active = ', '.join(f"'{s}'" for s in ACTIVE_BOOKING_STATUSES)
+    totals = "COUNT(*) AS bookings, SUM(duration) AS hours, ROUND(SUM(duration * price_per_hour), 2) AS revenue"
+    daily = connection.execute(text(
+        f"SELECT photographer_id, date, status, {totals} FROM ({source}) GROUP BY photographer_id, date, status"
+    )).mappings().all()
+    by_status = connection.execute(text(
+        f"SELECT photographer_id, status, {totals} FROM ({source}) GROUP BY photographer_id, status"
+    )).mappings().all()
+    by_client = connection.execute(text(
+        f"SELECT photographer_id, user_id, {totals} FROM ({source}) "
+        f"WHERE status IN ({active}) GROUP BY photographer_id, user_id"
+    )).mappings().all()
+    return daily, by_status, by_client
+
+def create_booking_table(connection, name, temporary=False):
+    connection.execute(text(
+        f"CREATE {'TEMP ' if temporary else ''}TABLE {name} (id TEXT, photographer_id TEXT, user_id TEXT, "
+        "date TEXT, status TEXT, duration INTEGER, price_per_hour REAL, created_at TEXT, "
+        "PRIMARY KEY (id, created_at))"
+    ))
+
+def current_rates(photographer_ids):
+    """Current price of each photographer, for bookings stored without a rate"""
+    if app.config['USE_AWS']:
+        return capture_moments.get_current_rates_from_dynamodb(photographer_ids)
+    ids = [int(i) for i in photographer_ids if str(i).isdigit()]
+    return {str(p.id): p.price_per_hour for p in Photographer.query.filter(Photographer.id.in_(ids))}
+
+def insert_bookings(connection, table, records, rates=None):
+    """Insert booking records, skipping bookings (id and created_at) the table
+    already has. With a rates dict, records without a rate are priced by
+    dynamodb_booking_rate and rates is filled in as photographers are looked up;
+    without one their rate is left NULL."""
+    if not records:
+        return
+    if rates is not None:
+        missing = {str(r['photographer_id']) for r in records if r.get('price_per_hour') is None}
+        rates.update(current_rates(missing - rates.keys()))
+    connection.execute(text(
+        f"INSERT OR IGNORE INTO {table} VALUES (:id, :photographer_id, :user_id, :date, :status, "
+        ":duration, :price_per_hour, :created_at)"
+    ), [{
+        'id': str(r.get('booking_id', r.get('id'))),
+        'photographer_id': str(r['photographer_id']),
+        'user_id': str(r['user_id']),
+        'date': r['date'],
+        'status': r.get('status', 'pending'),
+        'duration': int(r.get('duration', 1)),
+        'price_per_hour': dynamodb_booking_rate(r, rates) if rates is not None else r.get('price_per_hour'),
+        # Archived DynamoDB bookings keep their timestamp as created_at; '' rather
+        # than NULL so the primary key still dedupes records without one
+        'created_at': r.get('created_at', r.get('timestamp')) or ''
+    } for r in records])
+
+def scan_bookings():
+    """Pages of items from the DynamoDB booking table"""
+    # Items without a photographer or client have nothing to roll up into
+    kwargs = {'FilterExpression': Attr('photographer_id').exists() & Attr('user_id').exists()}
+    while True:
+        response = capture_moments.bookings_table.scan(**kwargs)
+        yield response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def load_bookings(pages):
+    """Load pages of booking records, plus archived bookings they no longer
+    contain, into an in-memory SQLite table named bookings"""
+    engine = create_engine('sqlite://')
+    with engine.begin() as connection:
+        create_booking_table(connection, 'bookings')
+        rates = {}
+        for records in pages:
+            insert_bookings(connection, 'bookings', records, rates)
+        insert_bookings(connection, 'bookings', query_archive(), rates)
+    return engine
+
+def load_export(path):
+    """load_bookings for an exported booking JSON lines file"""
+    with open(path) as f:
+        return load_bookings([[json.loads(line) for line in f if line.strip()]])
+
+def write_sqlite(daily, by_status, by_client):
+    """Replace the SQLite rollup tables with freshly computed rows"""
+    for model in (DailyBookingRollup, StatusBookingRollup, ClientBookingRollup):
+        model.query.delete()
+    if daily:
+        db.session.execute(insert(DailyBookingRollup), [
+            dict(r, date=datetime.strptime(str(r['date']), '%Y-%m-%d').date()) for r in daily
+        ])
+    if by_status:
+        db.session.execute(insert(StatusBookingRollup), [dict(r) for r in by_status])
+    if by_client:
+        db.session.execute(insert(ClientBookingRollup), [dict(r) for r in by_client])
+    db.session.commit()
+
+def write_dynamodb(daily, by_status, by_client):
+    """Replace the DynamoDB booking_stats items with freshly computed ones"""
+    def item(row, stat_key):
+        return {
+            'photographer_id': row['photographer_id'],
+            'stat_key': stat_key,
+            'bookings': int(row['bookings']),
+            'hours': int(row['hours']),
+            'revenue': Decimal(str(row['revenue']))
+        }
+    items = [item(r, f"day#{r['date']}#{r['status']}") for r in daily] + \
+        [item(r, f"status#{r['status']}") for r in by_status] + \
+        [item(r, f"client#{r['user_id']}") for r in by_client]
+    with capture_moments.booking_stats_table.batch_writer() as batch:
+        for i in items:
+            batch.put_item(Item=i)
+    # Anything else is left over from bookings that no longer count, e.g. a
+    # day whose only booking changed status
+    fresh = {(i['photographer_id'], i['stat_key']) for i in items}
+    kwargs = {'ProjectionExpression': 'photographer_id, stat_key'}
+    with capture_moments.booking_stats_table.batch_writer() as batch:
+        while True:
+            response = capture_moments.booking_stats_table.scan(**kwargs)
+            for key in response.get('Items', []):
+                if (key['photographer_id'], key['stat_key']) not in fresh:
+                    batch.delete_item(Key=key)
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def main():
+    """Main backfill function"""
+    parser = argparse.ArgumentParser(description='Rebuild booking analytics rollups')
+    parser.add_argument('--export', help='JSON lines file of exported bookings to aggregate')
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.export or app.config['USE_AWS']:
+            engine = load_export(args.export) if args.export else load_bookings(scan_bookings())
+            with engine.connect() as connection:
+                daily, by_status, by_client = aggregate(connection, 'SELECT * FROM bookings')
+        else:
+            create_booking_table(db.session, 'archived_booking', temporary=True)
+            insert_bookings(db.session, 'archived_booking', query_archive())
+            daily, by_status, by_client = aggregate(db.session, SQLITE_SOURCE)
+            db.session.execute(text('DROP TABLE archived_booking'))
+
+        if app.config['USE_AWS']:
+            write_dynamodb(daily, by_status, by_client)
+        else:
+            write_sqlite(daily, by_status, by_client)
+        print(f"✅ Backfilled {len(daily)} daily, {len(by_status)} status and {len(by_client)} client rollups")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Worker Benchmark for Capture Moments
+Starts gunicorn once per worker configuration, drives concurrent GET traffic
+at one path and reports requests per second, latency and resident memory per
+concurrently served request (Linux only, read from /proc).
+
+The backend comes from the environment as usual. To measure the effect of
+overlapping DynamoDB round trips without an AWS account, run a moto server
+and point boto3 at it:
+
+    moto_server -p 5001 &
+    USE_AWS=true AWS_ENDPOINT_URL=http://127.0.0.1:5001 python deploy_aws.py
+    USE_AWS=true AWS_ENDPOINT_URL=http://127.0.0.1:5001 \\
+        python benchmark_workers.py --path /photographers --concurrency 32
+
+Usage:
+    python benchmark_workers.py [--path /] [--concurrency 16] [--duration 10]
+                                [--workers 2] [--threads 8]
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def wait_until_up(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=2).read()
+            return True
+        except Exception:
+            time.sleep(0.2)
+    return False
+
+def worker_rss_mb(master_pid):
+    """Total resident memory of gunicorn's worker processes in MB"""
+    try:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+            pids = f.read().split()
+    except OSError:
+        return None
+    total_kb = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            pass
+    return total_kb / 1024
+
+def run_load(url, concurrency, duration):
+    """Hammer url from `concurrency` client threads; returns sorted latencies and errors"""
+    deadline = time.time() + duration
+
+    def client():
+        latencies, errors = [], 0
+        while time.time() < deadline:
+            start = time.perf_counter()
+            try:
+                urllib.request.urlopen(url, timeout=30).read()
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+        return latencies, errors
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: client(), range(concurrency)))
+    latencies = sorted(l for result in results for l in result[0])
+    return latencies, sum(result[1] for result in results)
+
+def benchmark(worker_class, workers, threads, args):
+    port = free_port()
+    env = dict(os.environ,
+               GUNICORN_WORKER_CLASS=worker_class,
+               GUNICORN_WORKERS=str(workers),
+               GUNICORN_THREADS=str(threads),
+               GUNICORN_BIND=f"127.0.0.1:{port}")
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'app:app'], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}{args.path}"
+    try:
+        if not wait_until_up(url):
+            print(f"❌ gunicorn ({worker_class}) did not start")
+            return None
+        run_load(url, args.concurrency, min(2, args.duration))  # warm up
+        latencies, errors = run_load(url, args.concurrency, args.duration)
+        rss = worker_rss_mb(server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+    if not latencies:
+        print(f"❌ No successful requests with {worker_class} workers ({errors} errors)")
+        return None
+    in_flight = min(args.concurrency, workers * threads)
+    return {
+        'config': f"{worker_class} {workers}x{threads}",
+        'rps': len(latencies) / args.duration,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000,
+        'errors': errors,
+        'rss_mb': rss,
+        'mb_per_request': rss / in_flight if rss is not None else None
+    }
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description='Compare sync and threaded gunicorn workers')
+    parser.add_argument('--path', default='/')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"🚀 Benchmarking {args.path} with {args.concurrency} concurrent clients for {args.duration}s each")
+    results = [r for r in (
+        benchmark('sync', args.workers, 1, args),
+        benchmark('gthread', args.workers, args.threads, args)
+    ) if r]
+
+    print(f"\n{'config':<16}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}{'RSS MB':>10}{'MB/req':>10}")
+    for r in results:
+        rss = f"{r['rss_mb']:.1f}" if r['rss_mb'] is not None else 'n/a'
+        per_request = f"{r['mb_per_request']:.1f}" if r['mb_per_request'] is not None else 'n/a'
+        print(f"{r['config']:<16}{r['rps']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+              f"{r['errors']:>8}{rss:>10}{per_request:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Content-Addressed Blob Storage for Capture Moments
+Uploaded images are stored under the SHA-256 of their bytes (plus the file
+extension), so identical uploads are kept once and a key never changes
+meaning. That makes the key itself a strong ETag and lets responses be cached
+forever.
+
+Backends:
+  LocalBlobStore - files on local disk, served with sendfile via send_file
+  S3BlobStore    - any S3-compatible service (AWS S3, MinIO, moto server)
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from datetime import datetime, timezone
+
+import boto3
+from botocore.exceptions import ClientError
+from flask import Response, abort, request, send_file
+
+BLOB_KEY_RE = re.compile(r'^[0-9a-f]{64}(\.[a-z0-9]{1,5})?$')
+ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+MAX_AGE = 365 * 24 * 3600
+
+def blob_key(data, filename=''):
+    """Content-derived key: sha256 hex digest plus a whitelisted extension"""
+    ext = os.path.splitext(filename)[1].lower()
+    return hashlib.sha256(data).hexdigest() + (ext if ext in ALLOWED_EXTENSIONS else '')
+
+def is_blob_key(name):
+    return bool(name) and bool(BLOB_KEY_RE.match(name))
+
+def _etag(key):
+    return key.split('.')[0]
+
+def _mimetype(key):
+    return mimetypes.guess_type(key)[0] or 'application/octet-stream'
+
+class LocalBlobStore:
+    """Blobs as files under root/<2 hex>/<2 hex>/<key>"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def put(self, data, filename=''):
+        key = blob_key(data, filename)
+        path = self.path(key)
+        if os.path.exists(path):
+            # Re-uploading counts as a fresh write, so gc's grace period covers it
+            os.utime(path)
+            return key
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return key
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self):
+        """Yield (key, last modified) for every stored blob"""
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if is_blob_key(name):
+                    modified = os.path.getmtime(os.path.join(dirpath, name))
+                    yield name, datetime.fromtimestamp(modified, timezone.utc)
+
+    def send(self, key):
+        """Serve a blob; send_file handles If-None-Match, Range and sendfile"""
+        path = self.path(key)
+        if not os.path.exists(path):
+            abort(404)
+        response = send_file(path, mimetype=_mimetype(key), etag=_etag(key),
+                             conditional=True, max_age=MAX_AGE)
+        response.cache_control.immutable = True
+        return response
+
+class S3BlobStore:
+    """Blobs as objects under prefix in an S3-compatible bucket"""
+
+    def __init__(self, bucket, prefix='blobs/', endpoint_url=None, region_name=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region_name)
+
+    def object_key(self, key):
+        return self.prefix + key
+
+    def head(self, key):
+        """Object size, or None if it does not exist"""
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))['ContentLength']
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def put(self, data, filename=''):
+        key = blob_key(data, filename)
+        headers = {'ContentType': _mimetype(key), 'CacheControl': f"public, max-age={MAX_AGE}, immutable"}
+        if self.head(key) is None:
+            self.client.put_object(Bucket=self.bucket, Key=self.object_key(key), Body=data, **headers)
+        else:
+            # Copy the object onto itself to bump LastModified, so gc's grace
+            # period covers a re-upload whose profile update is not saved yet
+            self.client.copy_object(Bucket=self.bucket, Key=self.object_key(key),
+                                    CopySource={'Bucket': self.bucket, 'Key': self.object_key(key)},
+                                    MetadataDirective='REPLACE', **headers)
+        return key
+
+    def exists(self, key):
+        return self.head(key) is not None
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+    def list(self):
+        """Yield (key, last modified) for every stored blob"""
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get('Contents', []):
+                key = obj['Key'][len(self.prefix):]
+                if is_blob_key(key):
+                    yield key, obj['LastModified']
+
+    def send(self, key):
+        """Serve a blob with a strong ETag, 304s and single byte ranges"""
+        etag = _etag(key)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+        size = self.head(key)
+        if size is None:
+            abort(404)
+
+        get_kwargs = {'Bucket': self.bucket, 'Key': self.object_key(key)}
+        status = 200
+        content_range = None
+        if request.range and request.range.units == 'bytes' and len(request.range.ranges) == 1:
+            byte_range = request.range.range_for_length(size)
+            if byte_range is None:
+                response = Response(status=416)
+                response.headers['Content-Range'] = f"bytes */{size}"
+                return response
+            start, stop = byte_range
+            get_kwargs['Range'] = f"bytes={start}-{stop - 1}"
+            status = 206
+            content_range = f"bytes {start}-{stop - 1}/{size}"
+            size = stop - start
+
+        body = self.client.get_object(**get_kwargs)['Body']
+        response = Response(body.iter_chunks(), status=status, mimetype=_mimetype(key), direct_passthrough=True)
+        response.content_length = size
+        response.accept_ranges = 'bytes'
+        if content_range:
+            response.headers['Content-Range'] = content_range
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = MAX_AGE
+        response.cache_control.immutable = True
+        return response
+
+def create_blob_store(config):
+    """Build the backend selected by BLOB_STORE ('local' or 's3')"""
+    if config['BLOB_STORE'] == 's3':
+        return S3BlobStore(config['BLOB_BUCKET'], endpoint_url=config['BLOB_ENDPOINT_URL'],
+                           region_name=config['AWS_REGION'])
+    return LocalBlobStore(config['BLOB_DIR'])
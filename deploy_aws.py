@@ -6,6 +6,9 @@ This script helps set up DynamoDB tables and prepare for deployment
 
 import boto3
 import json
+import os
+import time
+from datetime import datetime, timedelta
 from botocore.exceptions import ClientError
 
 def create_dynamodb_tables(region_name='ap-south-1'):
@@ -29,7 +32,17 @@ def create_dynamodb_tables(region_name='ap-south-1'):
                 {'AttributeName': 'photographer_id', 'KeyType': 'HASH'}
             ],
             'AttributeDefinitions': [
-                {'AttributeName': 'photographer_id', 'AttributeType': 'S'}
+                {'AttributeName': 'photographer_id', 'AttributeType': 'S'},
+                {'AttributeName': 'user_id', 'AttributeType': 'S'}
+            ],
+            'GlobalSecondaryIndexes': [
+                {
+                    'IndexName': 'user_id-index',
+                    'KeySchema': [
+                        {'AttributeName': 'user_id', 'KeyType': 'HASH'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                }
             ],
             'BillingMode': 'PAY_PER_REQUEST'
         },
@@ -38,7 +51,69 @@ def create_dynamodb_tables(region_name='ap-south-1'):
                 {'AttributeName': 'booking_id', 'KeyType': 'HASH'}
             ],
             'AttributeDefinitions': [
-                {'AttributeName': 'booking_id', 'AttributeType': 'S'}
+                {'AttributeName': 'booking_id', 'AttributeType': 'S'},
+                {'AttributeName': 'photographer_id', 'AttributeType': 'S'},
+                {'AttributeName': 'user_id', 'AttributeType': 'S'},
+                {'AttributeName': 'date', 'AttributeType': 'S'},
+                {'AttributeName': 'status', 'AttributeType': 'S'},
+                {'AttributeName': 'timestamp', 'AttributeType': 'S'},
+                {'AttributeName': 'month', 'AttributeType': 'S'}
+            ],
+            'GlobalSecondaryIndexes': [
+                {
+                    'IndexName': 'photographer_id-date-index',
+                    'KeySchema': [
+                        {'AttributeName': 'photographer_id', 'KeyType': 'HASH'},
+                        {'AttributeName': 'date', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                },
+                {
+                    'IndexName': 'user_id-date-index',
+                    'KeySchema': [
+                        {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+                        {'AttributeName': 'date', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                },
+                {
+                    'IndexName': 'status-timestamp-index',
+                    'KeySchema': [
+                        {'AttributeName': 'status', 'KeyType': 'HASH'},
+                        {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                },
+                {
+                    'IndexName': 'month-date-index',
+                    'KeySchema': [
+                        {'AttributeName': 'month', 'KeyType': 'HASH'},
+                        {'AttributeName': 'date', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                }
+            ],
+            'BillingMode': 'PAY_PER_REQUEST'
+        },
+        'availability': {
+            'KeySchema': [
+                {'AttributeName': 'date', 'KeyType': 'HASH'},
+                {'AttributeName': 'photographer_id', 'KeyType': 'RANGE'}
+            ],
+            'AttributeDefinitions': [
+                {'AttributeName': 'date', 'AttributeType': 'S'},
+                {'AttributeName': 'photographer_id', 'AttributeType': 'S'}
+            ],
+            'BillingMode': 'PAY_PER_REQUEST'
+        },
+        'booking_stats': {
+            'KeySchema': [
+                {'AttributeName': 'photographer_id', 'KeyType': 'HASH'},
+                {'AttributeName': 'stat_key', 'KeyType': 'RANGE'}
+            ],
+            'AttributeDefinitions': [
+                {'AttributeName': 'photographer_id', 'AttributeType': 'S'},
+                {'AttributeName': 'stat_key', 'AttributeType': 'S'}
             ],
             'BillingMode': 'PAY_PER_REQUEST'
         }
@@ -52,6 +127,7 @@ def create_dynamodb_tables(region_name='ap-south-1'):
             table = dynamodb.Table(table_name)
             table.load()
             print(f"✅ Table '{table_name}' already exists")
+            add_missing_indexes(dynamodb.meta.client, table_name, table_config)
             created_tables.append(table_name)
         except ClientError as e:
             if e.response['Error']['Code'] == 'ResourceNotFoundException':
@@ -71,6 +147,136 @@ def create_dynamodb_tables(region_name='ap-south-1'):
     
     return created_tables
 
+def add_missing_indexes(client, table_name, table_config):
+    """Create GSIs that were added to a table definition after the table existed"""
+    
+    description = client.describe_table(TableName=table_name)['Table']
+    existing = {index['IndexName'] for index in description.get('GlobalSecondaryIndexes', [])}
+    attributes = {a['AttributeName']: a for a in table_config['AttributeDefinitions']}
+    
+    for index in table_config.get('GlobalSecondaryIndexes', []):
+        if index['IndexName'] in existing:
+            continue
+        try:
+            # DynamoDB builds one new index per update_table call
+            client.update_table(
+                TableName=table_name,
+                AttributeDefinitions=[attributes[k['AttributeName']] for k in index['KeySchema']],
+                GlobalSecondaryIndexUpdates=[{'Create': index}]
+            )
+            print(f"⏳ Building index '{index['IndexName']}' on '{table_name}'...")
+            while True:
+                indexes = client.describe_table(TableName=table_name)['Table'].get('GlobalSecondaryIndexes', [])
+                status = next((i.get('IndexStatus') for i in indexes if i['IndexName'] == index['IndexName']), None)
+                if status == 'ACTIVE':
+                    break
+                time.sleep(10)
+            print(f"✅ Added index '{index['IndexName']}' to '{table_name}'")
+        except Exception as e:
+            print(f"❌ Failed to add index '{index['IndexName']}' to '{table_name}': {e}")
+
+def enable_time_to_live(region_name='ap-south-1'):
+    """Let DynamoDB delete expired bookings and past availability on its own"""
+    
+    client = boto3.client('dynamodb', region_name=region_name)
+    
+    for table_name in ('booking', 'availability'):
+        try:
+            status = client.describe_time_to_live(TableName=table_name)['TimeToLiveDescription']
+            if status.get('TimeToLiveStatus') in ('ENABLED', 'ENABLING'):
+                print(f"✅ TTL already enabled on '{table_name}'")
+                continue
+            client.update_time_to_live(
+                TableName=table_name,
+                TimeToLiveSpecification={'Enabled': True, 'AttributeName': 'expires_at'}
+            )
+            print(f"✅ Enabled TTL on '{table_name}' (expires_at)")
+        except Exception as e:
+            print(f"❌ Failed to enable TTL on '{table_name}': {e}")
+
+def stamp_booking_expiry(region_name='ap-south-1'):
+    """One-time migration: give bookings written before TTL and archival existed
+    the expires_at and month attributes app.py now writes. Bookings already
+    past their TTL get ARCHIVE_GRACE_DAYS from now instead, so the first
+    `maintenance.py run --since YYYY-MM` can archive them before deletion."""
+    
+    table = boto3.resource('dynamodb', region_name=region_name).Table('booking')
+    keep_days = int(os.environ.get('BOOKING_ARCHIVE_DAYS', 365)) + int(os.environ.get('ARCHIVE_GRACE_DAYS', 30))
+    earliest = int((datetime.now() + timedelta(days=int(os.environ.get('ARCHIVE_GRACE_DAYS', 30)))).timestamp())
+    stamped = 0
+    kwargs = {
+        'FilterExpression': 'attribute_not_exists(expires_at) OR attribute_not_exists(#m)',
+        'ProjectionExpression': 'booking_id, #d, expires_at',
+        'ExpressionAttributeNames': {'#d': 'date', '#m': 'month'}
+    }
+    while True:
+        response = table.scan(**kwargs)
+        for item in response.get('Items', []):
+            try:
+                booking_date = datetime.strptime(item.get('date', ''), '%Y-%m-%d')
+            except ValueError:
+                print(f"⚠️  Booking '{item['booking_id']}' has no valid date; skipped")
+                continue
+            expires_at = item.get('expires_at') or \
+                max(int((booking_date + timedelta(days=keep_days)).timestamp()), earliest)
+            table.update_item(
+                Key={'booking_id': item['booking_id']},
+                UpdateExpression='SET expires_at = :exp, #m = :month',
+                ExpressionAttributeNames={'#m': 'month'},
+                ExpressionAttributeValues={':exp': expires_at, ':month': booking_date.strftime('%Y-%m')}
+            )
+            stamped += 1
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    print(f"✅ Stamped expires_at and month on {stamped} existing booking(s)")
+    return stamped
+
+def link_photographers_to_users(region_name='ap-south-1'):
+    """Set user_id on photographer items created before accounts owned them
+    (e.g. the photo_00x samples), matching the item's Name to a photographer
+    account's username. Returns the photographer_ids left unlinked."""
+    
+    dynamodb = boto3.resource('dynamodb', region_name=region_name)
+    photographers = dynamodb.Table('photographers')
+    users = dynamodb.Table('users')
+    
+    def scan_all(table, **kwargs):
+        while True:
+            response = table.scan(**kwargs)
+            yield from response.get('Items', [])
+            if 'LastEvaluatedKey' not in response:
+                return
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    accounts = {}
+    for user in scan_all(users, ProjectionExpression='user_id, username, is_photographer'):
+        if user.get('is_photographer'):
+            accounts.setdefault(user.get('username', '').strip().lower(), []).append(user['user_id'])
+    
+    unlinked = []
+    for item in scan_all(photographers, FilterExpression='attribute_not_exists(user_id)'):
+        matches = accounts.get(item.get('Name', '').strip().lower(), [])
+        if len(matches) != 1:
+            unlinked.append(item['photographer_id'])
+            continue
+        try:
+            photographers.update_item(
+                Key={'photographer_id': item['photographer_id']},
+                UpdateExpression='SET user_id = :uid',
+                ConditionExpression='attribute_not_exists(user_id)',
+                ExpressionAttributeValues={':uid': matches[0]}
+            )
+            print(f"✅ Linked photographer '{item['photographer_id']}' to user {matches[0]}")
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                print(f"❌ Failed to link photographer '{item['photographer_id']}': {e}")
+                unlinked.append(item['photographer_id'])
+    
+    for photographer_id in unlinked:
+        print(f"⚠️  Photographer '{photographer_id}' has no single matching account; set its user_id by hand")
+    return unlinked
+
 def add_sample_photographers(region_name='ap-south-1'):
     """Add sample photographers to DynamoDB"""
     
@@ -133,6 +339,13 @@ def main():
             for table in created_tables:
                 print(f"   - {table}")
         
+        print("\n⏳ Enabling TTL...")
+        enable_time_to_live(region)
+        stamp_booking_expiry(region)
+        
+        print("\n🔗 Linking photographer profiles to their accounts...")
+        link_photographers_to_users(region)
+        
         # Add sample data
         add_sample = input("\n📸 Add sample photographers? (y/n): ").strip().lower()
         if add_sample == 'y':
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Blob Garbage Collector for Capture Moments
+Deletes stored images that no photographer profile references any more
+(e.g. replaced profile pictures). Blobs younger than the grace period are
+kept so an upload whose profile update has not been committed yet survives.
+
+Usage:
+    python gc_blobs.py [--grace-hours 24] [--dry-run]
+"""
+
+import argparse
+from datetime import datetime, timedelta, timezone
+
+import app as capture_moments
+from app import app, blob_store, Photographer
+
+def referenced_keys():
+    """Every image key currently used by a photographer profile"""
+    if app.config['USE_AWS']:
+        keys = set()
+        kwargs = {'ProjectionExpression': 'Photo'}
+        while True:
+            response = capture_moments.photographers_table.scan(**kwargs)
+            keys.update(item['Photo'] for item in response.get('Items', []) if item.get('Photo'))
+            if 'LastEvaluatedKey' not in response:
+                return keys
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return {key for (key,) in Photographer.query.with_entities(Photographer.profile_image) if key}
+
+def collect(grace_hours=24, dry_run=False):
+    """Delete unreferenced blobs older than the grace period; returns their keys"""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=grace_hours)
+    in_use = referenced_keys()
+    orphans = [key for key, modified in blob_store.list() if key not in in_use and modified < cutoff]
+    if not dry_run:
+        for key in orphans:
+            blob_store.delete(key)
+    return orphans
+
+def main():
+    """Main garbage collection function"""
+    parser = argparse.ArgumentParser(description='Delete unreferenced profile images')
+    parser.add_argument('--grace-hours', type=float, default=24)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    with app.app_context():
+        orphans = collect(args.grace_hours, args.dry_run)
+        action = 'Would delete' if args.dry_run else 'Deleted'
+        print(f"🧹 {action} {len(orphans)} orphaned blob(s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Gunicorn configuration for Capture Moments (picked up automatically by the
+Procfile's `gunicorn app:app`).
+
+GUNICORN_WORKER_CLASS=sync keeps one request per process. gthread serves
+GUNICORN_THREADS requests per process, so DynamoDB round trips overlap
+instead of idling a whole worker. The app is thread-safe in that mode:
+Flask-SQLAlchemy scopes sessions to the app context, boto3 resources are
+per thread (ThreadLocalDynamoDB) and SQLite runs in WAL mode with a busy
+timeout.
+
+Each request thread may fan out up to FANOUT_PER_REQUEST backend calls; the
+fan-out pool defaults to GUNICORN_THREADS x FANOUT_PER_REQUEST threads per
+process so requests never wait on each other's calls. Every pool thread keeps
+its own boto3 resource (several MB), so lower FANOUT_PER_REQUEST to trade
+latency for memory.
+"""
+
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+workers = int(os.environ.get('GUNICORN_WORKERS', 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1 if worker_class == 'sync' else 8))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+if os.environ.get('GUNICORN_BIND'):
+    bind = os.environ['GUNICORN_BIND']
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Booking Maintenance for Capture Moments
+Keeps the hot booking tables bounded no matter how much history accumulates.
+
+SQLite mode:
+  - pending bookings nobody answered within PENDING_EXPIRY_DAYS (or whose date
+    has passed) become 'expired', releasing their slots
+  - bookings dated more than BOOKING_ARCHIVE_DAYS ago move into gzipped JSON
+    lines partitions, one per booking month (see archive_store.py)
+  - past availability bitmaps and delivered notifications are dropped
+  - the database is compacted with incremental VACUUM and ANALYZE
+DynamoDB mode:
+  - stale pending bookings are expired the same way, found through the
+    status-timestamp-index GSI instead of a scan
+  - bookings past the horizon are archived the same way, usually to S3, read
+    month by month through the month-date-index GSI and then deleted
+  - items also carry an expires_at TTL attribute, ARCHIVE_GRACE_DAYS after
+    the horizon, as a backstop (older items are stamped once by deploy_aws.py)
+  - the notification outbox stays in SQLite, so old delivered notifications
+    are dropped as well
+
+Analytics rollups are left untouched, so dashboards still count history.
+
+Usage:
+    python maintenance.py run [--every SECONDS] [--since YYYY-MM]
+    python maintenance.py query [--photographer-id ID] [--user-id ID] [--from YYYY-MM] [--to YYYY-MM]
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from boto3.dynamodb.conditions import Attr, Key
+from sqlalchemy import text
+
+import app as capture_moments
+from archive_store import create_archive_store
+from app import (app, db, Booking, OutboxMessage, PhotographerAvailability, dynamodb_booking_revenue,
+                 enqueue_notification, get_user_email_from_dynamodb, move_booking_rollups,
+                 notify_booking_change, release_slots, slot_mask, update_booking_status_in_dynamodb,
+                 update_slots_in_dynamodb)
+
+OUTBOX_RETENTION_DAYS = 30
+ARCHIVE_BATCH_SIZE = 1000
+VACUUM_PAGES = 1000
+
+archive_store = create_archive_store(app.config)
+
+def expire_stale_pending(now):
+    """Mark unanswered pending bookings as expired; returns how many"""
+    cutoff = now - timedelta(days=app.config['PENDING_EXPIRY_DAYS'])
+    stale = Booking.query.filter(
+        Booking.status == 'pending',
+        (Booking.created_at < cutoff) | (Booking.date < now.date())
+    ).all()
+    for booking in stale:
+        move_booking_rollups(booking.photographer_id, booking.user_id, booking.date, 'pending', 'expired',
+                             booking.duration, booking.revenue)
+        release_slots(booking.photographer_id, booking.date, slot_mask(booking.time, booking.duration))
+        booking.status = 'expired'
+        notify_booking_change(booking, 'expired')
+    db.session.commit()
+    return len(stale)
+
+def expire_stale_pending_in_dynamodb(now):
+    """DynamoDB version of expire_stale_pending; returns how many were expired"""
+    cutoff = now - timedelta(days=app.config['PENDING_EXPIRY_DAYS'])
+    kwargs = {
+        'IndexName': 'status-timestamp-index',
+        'KeyConditionExpression': Key('status').eq('pending'),
+        'FilterExpression': Attr('timestamp').lt(cutoff.isoformat()) | Attr('date').lt(now.date().isoformat())
+    }
+    expired = 0
+    while True:
+        response = capture_moments.bookings_table.query(**kwargs)
+        for item in response.get('Items', []):
+            # Conditional on still being pending, so a booking answered meanwhile is left alone
+            booking = update_booking_status_in_dynamodb(item['booking_id'], item['photographer_id'], 'expired')
+            if not booking:
+                continue
+            booking_date = datetime.strptime(booking['date'], '%Y-%m-%d').date()
+            duration = int(booking['duration'])
+            photographer = capture_moments.get_photographer_from_dynamodb(booking['photographer_id']) or {}
+            move_booking_rollups(booking['photographer_id'], booking['user_id'], booking_date, 'pending', 'expired',
+                                 duration, dynamodb_booking_revenue(booking))
+            update_slots_in_dynamodb(booking['photographer_id'], booking_date,
+                                     slot_mask(datetime.strptime(booking['time'], '%H:%M').time(), duration),
+                                     reserve=False)
+            enqueue_notification(
+                f"booking:{booking['booking_id']}:expired:client", get_user_email_from_dynamodb(booking['user_id']),
+                'Your booking request expired',
+                f"Your booking request with {photographer.get('Name', 'your photographer')} on {booking['date']} "
+                f"at {booking['time']} for {duration} hour(s) expired without a response."
+            )
+            db.session.commit()
+            expired += 1
+        if 'LastEvaluatedKey' not in response:
+            return expired
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def archive_old_bookings(now):
+    """Move bookings older than the horizon into monthly gzip partitions; returns how many.
+
+    Works through ARCHIVE_BATCH_SIZE bookings at a time, oldest first, so
+    memory and each transaction stay bounded however much history there is.
+    """
+    horizon = now.date() - timedelta(days=app.config['BOOKING_ARCHIVE_DAYS'])
+    archived = 0
+    while True:
+        batch = Booking.query.filter(Booking.date < horizon, Booking.status != 'pending') \
+            .order_by(Booking.date, Booking.id).limit(ARCHIVE_BATCH_SIZE).all()
+        if not batch:
+            return archived
+        by_month = {}
+        for booking in batch:
+            by_month.setdefault(booking.date.strftime('%Y-%m'), []).append({
+                'id': booking.id,
+                'user_id': booking.user_id,
+                'photographer_id': booking.photographer_id,
+                'date': booking.date.isoformat(),
+                'time': booking.time.strftime('%H:%M'),
+                'duration': booking.duration,
+                'status': booking.status,
+                'price_per_hour': booking.price_per_hour,
+                'created_at': booking.created_at.isoformat() if booking.created_at else None
+            })
+        # Partitions are written (and synced) before rows are deleted; a crash in
+        # between only leaves duplicates, which query_archive drops.
+        for month, records in by_month.items():
+            archive_store.write(month, records)
+        for booking in batch:
+            db.session.delete(booking)
+        db.session.commit()
+        archived += len(batch)
+
+def archive_months(first, last):
+    """Every YYYY-MM from first to last inclusive"""
+    year, month = map(int, first.split('-'))
+    while f"{year:04d}-{month:02d}" <= last:
+        yield f"{year:04d}-{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+def archive_old_bookings_in_dynamodb(now, since=None):
+    """DynamoDB version of archive_old_bookings; returns how many were archived.
+
+    Only months that can still hold items are queried: anything older than
+    the horizon plus ARCHIVE_GRACE_DAYS has been removed by TTL. Pass since
+    (YYYY-MM) once to archive history from before this job ran.
+    """
+    horizon = now.date() - timedelta(days=app.config['BOOKING_ARCHIVE_DAYS'])
+    oldest = horizon - timedelta(days=app.config['ARCHIVE_GRACE_DAYS'] + 31)
+    archived = 0
+    for month in archive_months(since or oldest.strftime('%Y-%m'), horizon.strftime('%Y-%m')):
+        kwargs = {
+            'IndexName': 'month-date-index',
+            'KeyConditionExpression': Key('month').eq(month) & Key('date').lt(horizon.isoformat()),
+            'FilterExpression': Attr('status').ne('pending')
+        }
+        # One part per query page (at most 1 MB), deleted before the next is read
+        while True:
+            response = capture_moments.bookings_table.query(**kwargs)
+            items = response.get('Items', [])
+            if items:
+                archive_store.write(month, [{
+                    'id': item['booking_id'],
+                    'user_id': item.get('user_id'),
+                    'photographer_id': item.get('photographer_id'),
+                    'date': item['date'],
+                    'time': item.get('time'),
+                    'duration': int(item.get('duration', 1)),
+                    'status': item.get('status'),
+                    'price_per_hour': float(item['price_per_hour']) if 'price_per_hour' in item else None,
+                    'created_at': item.get('timestamp')
+                } for item in items])
+                with capture_moments.bookings_table.batch_writer() as batch:
+                    for item in items:
+                        batch.delete_item(Key={'booking_id': item['booking_id']})
+                archived += len(items)
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return archived
+
+def prune_outbox(now):
+    """Drop old delivered notifications; the outbox is SQLite in both modes"""
+    outbox_cutoff = now - timedelta(days=OUTBOX_RETENTION_DAYS)
+    messages = OutboxMessage.query.filter(OutboxMessage.status != 'pending',
+                                          OutboxMessage.created_at < outbox_cutoff) \
+        .delete(synchronize_session=False)
+    db.session.commit()
+    return messages
+
+def prune_hot_tables(now):
+    """Drop availability bitmaps for past days and old delivered notifications"""
+    bitmaps = PhotographerAvailability.query.filter(PhotographerAvailability.date < now.date()) \
+        .delete(synchronize_session=False)
+    db.session.commit()
+    return bitmaps, prune_outbox(now)
+
+def compact_sqlite():
+    """Return freed pages to the filesystem and refresh planner statistics"""
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        if connection.execute(text('PRAGMA auto_vacuum')).scalar() != 2:
+            # auto_vacuum only takes effect after a full VACUUM, needed once
+            connection.execute(text('PRAGMA auto_vacuum = INCREMENTAL'))
+            connection.execute(text('VACUUM'))
+        connection.execute(text(f"PRAGMA incremental_vacuum({VACUUM_PAGES})"))
+        connection.execute(text('ANALYZE'))
+
+def run_maintenance(since=None):
+    now = datetime.utcnow()
+    if app.config['USE_AWS']:
+        print(f"✅ Expired {expire_stale_pending_in_dynamodb(now)} stale pending DynamoDB booking(s)")
+        print(f"✅ Archived {archive_old_bookings_in_dynamodb(now, since)} old DynamoDB booking(s)")
+        print(f"✅ Pruned {prune_outbox(now)} delivered notification(s)")
+        return
+    print(f"✅ Expired {expire_stale_pending(now)} stale pending booking(s)")
+    print(f"✅ Archived {archive_old_bookings(now)} old booking(s)")
+    bitmaps, messages = prune_hot_tables(now)
+    print(f"✅ Pruned {bitmaps} past availability row(s) and {messages} delivered notification(s)")
+    compact_sqlite()
+    print("✅ Compacted and analyzed the SQLite database")
+
+def query_archive(photographer_id=None, user_id=None, start_month=None, end_month=None):
+    """Archived bookings matching the filters, reading only the partitions in range"""
+    seen = set()
+    results = []
+    for month in archive_store.months():
+        if (start_month and month < start_month) or (end_month and month > end_month):
+            continue
+        for record in archive_store.read(month):
+            # SQLite reuses the id of a deleted row, so a booking is its id plus creation time
+            key = (str(record['id']), record.get('created_at'))
+            if key in seen:
+                continue
+            # SQLite ids are integers and DynamoDB ids strings, so compare as text
+            if photographer_id is not None and str(record['photographer_id']) != str(photographer_id):
+                continue
+            if user_id is not None and str(record['user_id']) != str(user_id):
+                continue
+            seen.add(key)
+            results.append(record)
+    return results
+
+def main():
+    """Main maintenance function"""
+    parser = argparse.ArgumentParser(description='Expire, archive and compact bookings')
+    commands = parser.add_subparsers(dest='command')
+    run_parser = commands.add_parser('run', help='run the maintenance job')
+    run_parser.add_argument('--every', type=float, help='repeat every N seconds instead of exiting')
+    run_parser.add_argument('--since', help='DynamoDB only: also archive bookings from this month on, YYYY-MM')
+    query_parser = commands.add_parser('query', help='search archived bookings')
+    query_parser.add_argument('--photographer-id')
+    query_parser.add_argument('--user-id')
+    query_parser.add_argument('--from', dest='start_month', help='first month, YYYY-MM')
+    query_parser.add_argument('--to', dest='end_month', help='last month, YYYY-MM')
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.command == 'query':
+            for record in query_archive(args.photographer_id, args.user_id, args.start_month, args.end_month):
+                print(json.dumps(record))
+            return
+        since = getattr(args, 'since', None)
+        while True:
+            print(f"🧹 Booking maintenance started at {datetime.utcnow().isoformat()}")
+            run_maintenance(since)
+            since = None
+            if not getattr(args, 'every', None):
+                break
+            time.sleep(args.every)
+
+if __name__ == "__main__":
+    main()
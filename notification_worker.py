@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Notification Worker for Capture Moments
+Drains the outbox_message table written by app.py and delivers each message
+through a pluggable sender, with batching, retries and per-message dedupe.
+
+Senders (NOTIFICATION_SENDER):
+  file - append JSON lines to instance/outbox.jsonl (default, for local use)
+  smtp - send mail via SMTP_HOST:SMTP_PORT; for local testing point it at a
+         debugging server such as `python -m aiosmtpd -n -l localhost:1025`
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import smtplib
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from sqlalchemy import update
+
+from app import app, db, OutboxMessage
+
+BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 50))
+MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 5))
+LEASE_SECONDS = int(os.environ.get('OUTBOX_LEASE_SECONDS', 300))
+POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', 5))
+
+class FileSender:
+    """Writes each message as a JSON line, skipping keys already written"""
+
+    def __init__(self, path):
+        self.path = path
+        self.sent_keys = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.sent_keys = {json.loads(line)['dedupe_key'] for line in f if line.strip()}
+
+    def send(self, message):
+        if message.dedupe_key in self.sent_keys:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({
+                'dedupe_key': message.dedupe_key,
+                'to': message.recipient,
+                'subject': message.subject,
+                'body': message.body,
+                'sent_at': datetime.utcnow().isoformat()
+            }) + '\n')
+        self.sent_keys.add(message.dedupe_key)
+
+class SmtpSender:
+    """Sends mail over SMTP; the Message-ID is derived from the dedupe key so
+    receivers can drop a redelivery after a worker crash"""
+
+    def __init__(self, host, port, sender, username=None, password=None):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+
+    def send(self, message):
+        email = EmailMessage()
+        email['From'] = self.sender
+        email['To'] = message.recipient
+        email['Subject'] = message.subject
+        email['Message-ID'] = f"<{hashlib.sha256(message.dedupe_key.encode()).hexdigest()}@capture-moments>"
+        email.set_content(message.body)
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            if self.username:
+                smtp.starttls()
+                smtp.login(self.username, self.password)
+            smtp.send_message(email)
+
+def get_sender():
+    """Build the sender selected by NOTIFICATION_SENDER"""
+    kind = os.environ.get('NOTIFICATION_SENDER', 'file')
+    if kind == 'smtp':
+        return SmtpSender(
+            os.environ.get('SMTP_HOST', 'localhost'),
+            int(os.environ.get('SMTP_PORT', 1025)),
+            os.environ.get('SMTP_FROM', 'no-reply@capturemoments.com'),
+            os.environ.get('SMTP_USERNAME'),
+            os.environ.get('SMTP_PASSWORD')
+        )
+    if kind == 'file':
+        return FileSender(os.environ.get('OUTBOX_FILE', os.path.join(app.instance_path, 'outbox.jsonl')))
+    raise ValueError(f"Unknown NOTIFICATION_SENDER: {kind}")
+
+def claim_batch(now):
+    """Lease up to BATCH_SIZE due messages so concurrent workers skip them"""
+    due = OutboxMessage.query.filter(
+        OutboxMessage.status == 'pending',
+        OutboxMessage.next_attempt_at <= now
+    ).order_by(OutboxMessage.next_attempt_at).limit(BATCH_SIZE).all()
+    claimed = []
+    for message in due:
+        result = db.session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id == message.id,
+                   OutboxMessage.status == 'pending',
+                   OutboxMessage.next_attempt_at == message.next_attempt_at)
+            .values(attempts=OutboxMessage.attempts + 1,
+                    next_attempt_at=now + timedelta(seconds=LEASE_SECONDS))
+        )
+        if result.rowcount == 1:
+            claimed.append(message.id)
+    db.session.commit()
+    return OutboxMessage.query.filter(OutboxMessage.id.in_(claimed)).all() if claimed else []
+
+def drain_once(sender):
+    """Deliver one batch; returns the number of messages attempted"""
+    now = datetime.utcnow()
+    batch = claim_batch(now)
+    for message in batch:
+        try:
+            sender.send(message)
+            message.status = 'sent'
+            message.sent_at = datetime.utcnow()
+            message.last_error = None
+        except Exception as e:
+            message.last_error = str(e)
+            if message.attempts >= MAX_ATTEMPTS:
+                message.status = 'failed'
+                print(f"❌ Giving up on {message.dedupe_key}: {e}")
+            else:
+                backoff = min(30 * 2 ** (message.attempts - 1), 3600)
+                message.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff)
+        db.session.commit()
+    return len(batch)
+
+def main():
+    """Main worker loop"""
+    parser = argparse.ArgumentParser(description='Deliver queued Capture Moments notifications')
+    parser.add_argument('--once', action='store_true', help='drain the outbox and exit')
+    args = parser.parse_args()
+
+    with app.app_context():
+        sender = get_sender()
+        print(f"📬 Notification worker started ({type(sender).__name__})")
+        while True:
+            delivered = drain_once(sender)
+            if delivered:
+                print(f"✅ Processed {delivered} notification(s)")
+                continue
+            if args.once:
+                break
+            time.sleep(POLL_INTERVAL)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Sampling Profiler Middleware for Capture Moments
+Profiles a fraction of requests (or requests flagged by header or route) with
+cProfile and aggregates the results per Flask endpoint into pstats files
+(one per endpoint and worker process: <PROFILE_DIR>/<endpoint>.<pid>.pstats).
+
+Render a dump offline, e.g.:
+    flameprof profiles/booking.1234.pstats > booking.svg
+    snakeviz profiles/booking.1234.pstats
+"""
+
+import atexit
+import cProfile
+import os
+import pstats
+import random
+import threading
+
+class SamplingProfilerMiddleware:
+    """WSGI middleware that profiles sampled requests and aggregates per route"""
+
+    def __init__(self, wsgi_app, url_map, profile_dir, sample_rate=0.0,
+                 routes=(), token=None, dump_every=20):
+        self.wsgi_app = wsgi_app
+        self.url_map = url_map
+        self.profile_dir = profile_dir
+        self.sample_rate = sample_rate
+        self.routes = set(routes)
+        self.token = token
+        self.dump_every = dump_every
+        self.stats = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+        os.makedirs(profile_dir, exist_ok=True)
+        atexit.register(self.dump_all)
+
+    def endpoint_for(self, environ):
+        """Flask endpoint name for the request, used as the aggregation key"""
+        try:
+            endpoint, _ = self.url_map.bind_to_environ(environ).match()
+            return endpoint
+        except Exception:
+            return 'unmatched'
+
+    def should_profile(self, environ):
+        if self.token and environ.get('HTTP_X_PROFILE') == self.token:
+            return True
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        return bool(self.routes) and self.endpoint_for(environ) in self.routes
+
+    def __call__(self, environ, start_response):
+        if not self.should_profile(environ):
+            return self.wsgi_app(environ, start_response)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this interpreter
+            return self.wsgi_app(environ, start_response)
+        try:
+            return self.wsgi_app(environ, start_response)
+        finally:
+            profiler.disable()
+            self.record(self.endpoint_for(environ), profiler)
+
+    def record(self, endpoint, profiler):
+        with self.lock:
+            if endpoint in self.stats:
+                self.stats[endpoint].add(profiler)
+            else:
+                self.stats[endpoint] = pstats.Stats(profiler)
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            if self.counts[endpoint] % self.dump_every == 0:
+                self.dump(endpoint)
+
+    def dump(self, endpoint):
+        """Write the aggregated stats for one endpoint (caller holds the lock)"""
+        path = os.path.join(self.profile_dir, f"{endpoint}.{os.getpid()}.pstats")
+        tmp_path = path + '.tmp'
+        self.stats[endpoint].dump_stats(tmp_path)
+        os.replace(tmp_path, path)
+
+    def dump_all(self):
+        with self.lock:
+            for endpoint in self.stats:
+                self.dump(endpoint)
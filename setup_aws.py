@@ -7,6 +7,7 @@ This script helps verify AWS configuration and test DynamoDB connection
 import boto3
 import sys
 from botocore.exceptions import ClientError, NoCredentialsError
+from deploy_aws import add_missing_indexes
 
 def check_aws_credentials():
     """Check if AWS credentials are properly configured"""
@@ -59,12 +60,86 @@ def create_tables_if_missing(region_name='ap-south-1'):
     required_tables = {
         'photographers': {
             'KeySchema': [{'AttributeName': 'photographer_id', 'KeyType': 'HASH'}],
-            'AttributeDefinitions': [{'AttributeName': 'photographer_id', 'AttributeType': 'S'}],
+            'AttributeDefinitions': [
+                {'AttributeName': 'photographer_id', 'AttributeType': 'S'},
+                {'AttributeName': 'user_id', 'AttributeType': 'S'}
+            ],
+            'GlobalSecondaryIndexes': [
+                {
+                    'IndexName': 'user_id-index',
+                    'KeySchema': [{'AttributeName': 'user_id', 'KeyType': 'HASH'}],
+                    'Projection': {'ProjectionType': 'ALL'}
+                }
+            ],
             'BillingMode': 'PAY_PER_REQUEST'
         },
         'booking': {
             'KeySchema': [{'AttributeName': 'booking_id', 'KeyType': 'HASH'}],
-            'AttributeDefinitions': [{'AttributeName': 'booking_id', 'AttributeType': 'S'}],
+            'AttributeDefinitions': [
+                {'AttributeName': 'booking_id', 'AttributeType': 'S'},
+                {'AttributeName': 'photographer_id', 'AttributeType': 'S'},
+                {'AttributeName': 'user_id', 'AttributeType': 'S'},
+                {'AttributeName': 'date', 'AttributeType': 'S'},
+                {'AttributeName': 'status', 'AttributeType': 'S'},
+                {'AttributeName': 'timestamp', 'AttributeType': 'S'},
+                {'AttributeName': 'month', 'AttributeType': 'S'}
+            ],
+            'GlobalSecondaryIndexes': [
+                {
+                    'IndexName': 'photographer_id-date-index',
+                    'KeySchema': [
+                        {'AttributeName': 'photographer_id', 'KeyType': 'HASH'},
+                        {'AttributeName': 'date', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                },
+                {
+                    'IndexName': 'user_id-date-index',
+                    'KeySchema': [
+                        {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+                        {'AttributeName': 'date', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                },
+                {
+                    'IndexName': 'status-timestamp-index',
+                    'KeySchema': [
+                        {'AttributeName': 'status', 'KeyType': 'HASH'},
+                        {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                },
+                {
+                    'IndexName': 'month-date-index',
+                    'KeySchema': [
+                        {'AttributeName': 'month', 'KeyType': 'HASH'},
+                        {'AttributeName': 'date', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                }
+            ],
+            'BillingMode': 'PAY_PER_REQUEST'
+        },
+        'availability': {
+            'KeySchema': [
+                {'AttributeName': 'date', 'KeyType': 'HASH'},
+                {'AttributeName': 'photographer_id', 'KeyType': 'RANGE'}
+            ],
+            'AttributeDefinitions': [
+                {'AttributeName': 'date', 'AttributeType': 'S'},
+                {'AttributeName': 'photographer_id', 'AttributeType': 'S'}
+            ],
+            'BillingMode': 'PAY_PER_REQUEST'
+        },
+        'booking_stats': {
+            'KeySchema': [
+                {'AttributeName': 'photographer_id', 'KeyType': 'HASH'},
+                {'AttributeName': 'stat_key', 'KeyType': 'RANGE'}
+            ],
+            'AttributeDefinitions': [
+                {'AttributeName': 'photographer_id', 'AttributeType': 'S'},
+                {'AttributeName': 'stat_key', 'AttributeType': 'S'}
+            ],
             'BillingMode': 'PAY_PER_REQUEST'
         }
     }
@@ -77,6 +152,7 @@ def create_tables_if_missing(region_name='ap-south-1'):
             table = dynamodb.Table(table_name)
             table.load()
             print(f"✅ Table '{table_name}' already exists")
+            add_missing_indexes(dynamodb.meta.client, table_name, table_config)
         except ClientError as e:
             if e.response['Error']['Code'] == 'ResourceNotFoundException':
                 # Create table
@@ -8,4 +8,34 @@
 //             behavior: 'smooth'
 //         });
 //     });
-// }); 
\ No newline at end of file
+// }); 
+
+// Autocomplete for inputs with data-autocomplete="<endpoint>" and a list="<datalist id>".
+// Suggestions come from the server's in-memory prefix index; only the text
+// after the last comma is completed so multi-value fields work.
+document.querySelectorAll('input[data-autocomplete]').forEach(input => {
+    const datalist = document.getElementById(input.getAttribute('list'));
+    let timer = null;
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        timer = setTimeout(() => {
+            const parts = input.value.split(',');
+            const prefix = parts.pop().trim();
+            const head = parts.length ? parts.join(',') + ', ' : '';
+            if (!prefix) {
+                datalist.innerHTML = '';
+                return;
+            }
+            fetch(input.dataset.autocomplete + '?q=' + encodeURIComponent(prefix))
+                .then(response => response.json())
+                .then(suggestions => {
+                    datalist.innerHTML = '';
+                    suggestions.forEach(suggestion => {
+                        const option = document.createElement('option');
+                        option.value = head + suggestion.value;
+                        datalist.appendChild(option);
+                    });
+                });
+        }, 100);
+    });
+});
@@ -0,0 +1,73 @@
+"""
+Test fixtures for Capture Moments
+The app runs in USE_AWS mode against moto's in-memory DynamoDB, with the
+tables created by deploy_aws.create_dynamodb_tables and every local path
+(SQLite database, blobs, archive, autocomplete snapshot) under a temp dir.
+app.py configures itself at import, so the environment is set up first.
+Every code path checks app.config['USE_AWS'] when it runs, so the sqlite_mode
+fixture switches a single test over to the SQLite models.
+"""
+
+import os
+import sys
+import uuid
+
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REGION = 'ap-south-1'
+
+@pytest.fixture(scope='session')
+def capture_moments(tmp_path_factory):
+    base = tmp_path_factory.mktemp('capture_moments')
+    os.environ.update(
+        USE_AWS='true',
+        AWS_REGION=REGION,
+        AWS_DEFAULT_REGION=REGION,
+        AWS_ACCESS_KEY_ID='testing',
+        AWS_SECRET_ACCESS_KEY='testing',
+        DATABASE_URL=f"sqlite:///{base / 'capture_moments.db'}",
+        BLOB_DIR=str(base / 'blobs'),
+        ARCHIVE_DIR=str(base / 'archive'),
+        AUTOCOMPLETE_SNAPSHOT=str(base / 'autocomplete.json')
+    )
+    with mock_aws():
+        import deploy_aws
+        deploy_aws.create_dynamodb_tables(REGION)
+        import app
+        app.app.config['TESTING'] = True
+        yield app
+
+def signup_and_login(capture_moments, user_type='client', username=None):
+    """Create an account with a unique username and return (logged-in client, user_id)"""
+    username = username or f"{user_type}-{uuid.uuid4().hex[:8]}"
+    client = capture_moments.app.test_client()
+    client.post('/signup', data={'username': username, 'email': f"{username}@example.com",
+                                 'password': 'secret', 'user_type': user_type})
+    client.post('/login', data={'username': username, 'password': 'secret'})
+    if not capture_moments.app.config['USE_AWS']:
+        with capture_moments.app.app_context():
+            return client, capture_moments.User.query.filter_by(username=username).one().id
+    return client, capture_moments.get_user_from_dynamodb(username)['user_id']
+
+@pytest.fixture
+def photographer(capture_moments):
+    return signup_and_login(capture_moments, 'photographer')
+
+@pytest.fixture
+def client(capture_moments):
+    return signup_and_login(capture_moments, 'client')
+
+@pytest.fixture
+def sqlite_mode(capture_moments, monkeypatch):
+    monkeypatch.setitem(capture_moments.app.config, 'USE_AWS', False)
+    return capture_moments
+
+@pytest.fixture
+def sqlite_photographer(sqlite_mode):
+    """(logged-in client, Photographer.id) for a new SQLite photographer"""
+    browser, user_id = signup_and_login(sqlite_mode, 'photographer')
+    with sqlite_mode.app.app_context():
+        return browser, sqlite_mode.Photographer.query.filter_by(user_id=user_id).one().id
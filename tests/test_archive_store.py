@@ -0,0 +1,29 @@
+"""Monthly booking archive partitions"""
+
+import boto3
+from moto import mock_aws
+
+from archive_store import LocalArchiveStore, S3ArchiveStore
+
+def test_local_parts(tmp_path):
+    store = LocalArchiveStore(str(tmp_path))
+    store.write('2024-01', [{'id': 1}])
+    store.write('2024-01', [{'id': 2}, {'id': 3}])
+    store.write('2024-03', [{'id': 4}])
+
+    assert store.months() == ['2024-01', '2024-03']
+    assert sorted(r['id'] for r in store.read('2024-01')) == [1, 2, 3]
+    assert list(store.read('2024-02')) == []
+
+def test_s3_parts(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    with mock_aws():
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='capture-moments-archive')
+        store = S3ArchiveStore('capture-moments-archive', region_name='us-east-1')
+        store.write('2024-01', [{'id': 'a'}])
+        store.write('2024-01', [{'id': 'b'}])
+        store.write('2023-12', [{'id': 'c'}])
+
+        assert store.months() == ['2023-12', '2024-01']
+        assert sorted(r['id'] for r in store.read('2024-01')) == ['a', 'b']
@@ -0,0 +1,82 @@
+"""Prefix autocomplete index and its shared snapshot"""
+
+import os
+import threading
+
+from autocomplete import AutocompleteIndex
+
+def make_index(tmp_path, values, **kwargs):
+    calls = []
+
+    def load_values():
+        calls.append(1)
+        return values
+    return AutocompleteIndex(str(tmp_path / 'autocomplete.json'), ('specialty',), load_values, **kwargs), calls
+
+def test_search_ranks_by_frequency(tmp_path):
+    index, _ = make_index(tmp_path, {'specialty': ['Wedding', 'wedding, Portrait', 'Wildlife']})
+    index.rebuild()
+    assert index.search('specialty', 'w') == [{'value': 'Wedding', 'count': 2}, {'value': 'Wildlife', 'count': 1}]
+    assert index.canonical('specialty', ' WEDDING ') == 'Wedding'
+
+def test_stale_snapshot_is_rebuilt_in_background(tmp_path):
+    index, _ = make_index(tmp_path, {'specialty': ['Wedding']}, check_interval=0, max_age=60)
+    index.rebuild()
+    os.utime(index.snapshot_path, (0, 0))
+
+    release = threading.Event()
+    rebuilt = threading.Event()
+
+    def slow_load():
+        release.wait(5)
+        return {'specialty': ['Wedding', 'Fashion']}
+    index.load_values = slow_load
+    original_rebuild = index.rebuild
+
+    def rebuild():
+        original_rebuild()
+        rebuilt.set()
+    index.rebuild = rebuild
+
+    # The database read is blocked, yet lookups answer from the stale snapshot
+    assert index.search('specialty', 'f') == []
+    assert index.search('specialty', 'we') == [{'value': 'Wedding', 'count': 1}]
+    release.set()
+    assert rebuilt.wait(5)
+    assert index.search('specialty', 'f') == [{'value': 'Fashion', 'count': 1}]
+
+def test_missing_snapshot_serves_empty_results_until_built(tmp_path):
+    release = threading.Event()
+    rebuilt = threading.Event()
+    calls = []
+
+    def slow_load():
+        calls.append(1)
+        release.wait(5)
+        return {'specialty': ['Wedding']}
+    index = AutocompleteIndex(str(tmp_path / 'autocomplete.json'), ('specialty',), slow_load, check_interval=0)
+    original_rebuild = index.rebuild
+
+    def rebuild():
+        original_rebuild()
+        rebuilt.set()
+    index.rebuild = rebuild
+
+    # The build is blocked, so lookups answer empty rather than waiting for it
+    assert index.search('specialty', 'w') == []
+    assert index.search('specialty', 'w') == []
+    release.set()
+    assert rebuilt.wait(5)
+    assert calls == [1]
+    assert index.search('specialty', 'w') == [{'value': 'Wedding', 'count': 1}]
+
+def test_prefix_cache_is_bounded(monkeypatch):
+    import autocomplete
+    monkeypatch.setattr(autocomplete, 'CACHE_SIZE', 3)
+    index = autocomplete.PrefixIndex([('wedding', 'Wedding', 2), ('wildlife', 'Wildlife', 1)])
+    for prefix in ('a', 'b', 'w', 'we', 'wi'):
+        index.search(prefix)
+    assert list(index.cache) == [('w', 10), ('we', 10), ('wi', 10)]
+    index.search('w')
+    index.search('x')
+    assert list(index.cache) == [('wi', 10), ('w', 10), ('x', 10)]
@@ -0,0 +1,51 @@
+"""Slot bitmap availability in SQLite mode"""
+
+from datetime import date, time
+
+from conftest import signup_and_login
+
+DAY = date(2030, 2, 4)
+
+def test_reserve_and_release_slots(sqlite_mode, sqlite_photographer):
+    _, photographer_id = sqlite_photographer
+    morning = sqlite_mode.slot_mask(time(10), 2)
+    with sqlite_mode.app.app_context():
+        assert sqlite_mode.reserve_slots(photographer_id, DAY, morning)
+        assert not sqlite_mode.reserve_slots(photographer_id, DAY, sqlite_mode.slot_mask(time(11), 2))
+        assert sqlite_mode.reserve_slots(photographer_id, DAY, sqlite_mode.slot_mask(time(12), 1))
+        sqlite_mode.release_slots(photographer_id, DAY, morning)
+        assert sqlite_mode.reserve_slots(photographer_id, DAY, sqlite_mode.slot_mask(time(11), 1))
+        sqlite_mode.db.session.commit()
+        assert sqlite_mode.get_day_bitmaps(DAY)[str(photographer_id)] == (1 << 11) | (1 << 12)
+
+def test_overlapping_booking_is_refused(sqlite_mode, sqlite_photographer):
+    _, photographer_id = sqlite_photographer
+    first, _ = signup_and_login(sqlite_mode, 'client')
+    second, _ = signup_and_login(sqlite_mode, 'client')
+    form = {'date': DAY.isoformat(), 'time': '14:00', 'duration': '2'}
+
+    assert b'Booking successful!' in first.post(f"/booking/{photographer_id}", data=form, follow_redirects=True).data
+    refused = second.post(f"/booking/{photographer_id}", data=dict(form, time='15:00'), follow_redirects=True)
+    assert b'The photographer is not available at that time.' in refused.data
+    past_midnight = second.post(f"/booking/{photographer_id}", data=dict(form, time='23:00'), follow_redirects=True)
+    assert b'Bookings must start and end on the same day.' in past_midnight.data
+    with sqlite_mode.app.app_context():
+        assert sqlite_mode.Booking.query.filter_by(photographer_id=photographer_id).count() == 1
+
+def test_availability_search(sqlite_mode, sqlite_photographer):
+    _, photographer_id = sqlite_photographer
+    with sqlite_mode.app.app_context():
+        assert sqlite_mode.reserve_slots(photographer_id, DAY, sqlite_mode.slot_mask(time(9), 3))
+        sqlite_mode.db.session.commit()
+    browser = sqlite_mode.app.test_client()
+
+    def found(**params):
+        response = browser.get('/availability/search', query_string=dict(date=DAY.isoformat(), **params))
+        assert response.status_code == 200
+        return photographer_id in [p['id'] for p in response.get_json()['photographers']]
+    assert not found(time='11:00', duration=1)
+    assert not found(time='08:00', duration=2)
+    assert found(time='12:00', duration=4)
+    assert browser.get('/availability/search', query_string={'date': DAY.isoformat(), 'time': '22:00',
+                                                              'duration': 3}).status_code == 400
+    assert browser.get('/availability/search').status_code == 400
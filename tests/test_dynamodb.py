@@ -0,0 +1,144 @@
+"""DynamoDB parity of dashboards, profiles and booking state changes"""
+
+from datetime import date
+from decimal import Decimal
+
+from conftest import signup_and_login
+
+BOOKING_DATE = '2030-01-07'
+
+def pending_booking(capture_moments, client_id, photographer_id, time='10:00', duration=2):
+    """Book through the same helpers the booking route uses, but left pending"""
+    booking_date = date.fromisoformat(BOOKING_DATE)
+    mask = capture_moments.slot_mask(capture_moments.datetime.strptime(time, '%H:%M').time(), duration)
+    assert capture_moments.update_slots_in_dynamodb(photographer_id, booking_date, mask)
+    booking_id = capture_moments.save_booking_to_dynamodb(client_id, photographer_id, BOOKING_DATE, time, duration,
+                                                          'pending', 100)
+    capture_moments.record_booking_rollups(photographer_id, client_id, booking_date, 'pending', duration, duration * 100)
+    return booking_id
+
+def test_client_books_and_sees_booking(capture_moments, photographer, client):
+    _, photographer_id = photographer
+    browser, _ = client
+    response = browser.post(f"/booking/{photographer_id}",
+                            data={'date': BOOKING_DATE, 'time': '14:00', 'duration': '2'})
+    assert response.location.endswith('/dashboard/client')
+
+    dashboard = browser.get('/dashboard/client')
+    assert dashboard.status_code == 200
+    assert BOOKING_DATE.encode() in dashboard.data
+    bookings = browser.get('/my_bookings')
+    assert bookings.status_code == 200
+    assert BOOKING_DATE.encode() in bookings.data
+
+def test_photographer_dashboard_and_my_bookings(capture_moments, photographer, client):
+    browser, photographer_id = photographer
+    _, client_id = client
+    pending_booking(capture_moments, client_id, photographer_id)
+
+    dashboard = browser.get('/dashboard/photographer')
+    assert dashboard.status_code == 200
+    assert BOOKING_DATE.encode() in dashboard.data
+    assert BOOKING_DATE.encode() in browser.get('/my_bookings').data
+
+def test_profile_and_edit_profile(capture_moments, photographer):
+    browser, photographer_id = photographer
+    response = browser.post('/edit_profile', data={'name': 'Priya Nair', 'specialty': 'Wedding',
+                                                   'location': 'Kochi', 'price_per_hour': '80.5', 'bio': 'Hi'})
+    assert response.status_code == 302
+
+    item = capture_moments.get_photographer_from_dynamodb(photographer_id)
+    assert item['Name'] == 'Priya Nair'
+    assert item['price_per_hour'] == Decimal('80.5')
+    profile = capture_moments.app.test_client().get(f"/profile/{photographer_id}")
+    assert profile.status_code == 200
+    assert b'Priya Nair' in profile.data
+    assert capture_moments.app.test_client().get('/profile/missing').status_code == 404
+
+def test_accept_twice_is_rejected_by_condition(capture_moments, photographer, client):
+    browser, photographer_id = photographer
+    _, client_id = client
+    booking_id = pending_booking(capture_moments, client_id, photographer_id)
+
+    first = browser.post(f"/booking/{booking_id}/accept", follow_redirects=True)
+    assert b'Booking accepted.' in first.data
+    second = browser.post(f"/booking/{booking_id}/accept", follow_redirects=True)
+    assert b'Booking cannot be accepted.' in second.data
+
+    item = capture_moments.bookings_table.get_item(Key={'booking_id': booking_id})['Item']
+    assert item['status'] == 'accepted'
+    analytics = capture_moments.get_booking_analytics(photographer_id)
+    assert analytics['bookings_by_status'] == {'accepted': 1}
+    assert analytics['revenue'] == 200
+
+def test_reject_releases_slots(capture_moments, photographer, client):
+    browser, photographer_id = photographer
+    _, client_id = client
+    booking_id = pending_booking(capture_moments, client_id, photographer_id, time='09:00', duration=3)
+
+    response = browser.post(f"/booking/{booking_id}/reject", follow_redirects=True)
+    assert b'Booking rejected.' in response.data
+    bitmaps = capture_moments.get_day_bitmaps(date.fromisoformat(BOOKING_DATE))
+    assert bitmaps[photographer_id] == 0
+
+def test_other_photographer_cannot_change_booking(capture_moments, photographer, client):
+    _, photographer_id = photographer
+    _, client_id = client
+    booking_id = pending_booking(capture_moments, client_id, photographer_id)
+    intruder, _ = signup_and_login(capture_moments, 'photographer')
+
+    assert intruder.post(f"/booking/{booking_id}/accept").status_code == 403
+    assert intruder.post('/booking/no-such-booking/accept').status_code == 404
+
+def test_linked_legacy_photographer_is_found_by_user(capture_moments, client):
+    import deploy_aws
+    legacy_id = f"photo_{client[1][:8]}"
+    name = f"Legacy {legacy_id}"
+    capture_moments.photographers_table.put_item(Item={
+        'photographer_id': legacy_id, 'Name': name, 'Location': 'Mumbai', 'price_per_hour': Decimal('1500')
+    })
+    browser, user_id = signup_and_login(capture_moments, 'photographer', username=name)
+    assert legacy_id not in deploy_aws.link_photographers_to_users(capture_moments.app.config['AWS_REGION'])
+
+    _, client_id = client
+    booking_id = pending_booking(capture_moments, client_id, legacy_id)
+    dashboard = browser.get('/dashboard/photographer')
+    assert b'Mumbai' in dashboard.data
+    assert BOOKING_DATE.encode() in dashboard.data
+    response = browser.post(f"/booking/{booking_id}/accept", follow_redirects=True)
+    assert b'Booking accepted.' in response.data
+
+def test_photographers_page_image_urls(capture_moments):
+    blob = 'ab' * 32 + '.png'
+    capture_moments.photographers_table.put_item(Item={
+        'photographer_id': f"blob-{blob[:8]}", 'Name': 'Blob Owner', 'Photo': blob, 'price_per_hour': Decimal('90')
+    })
+    capture_moments.photographers_table.put_item(Item={
+        'photographer_id': 'url-photo', 'Name': 'Url Owner', 'Photo': 'https://example.com/john.jpg',
+        'price_per_hour': Decimal('90')
+    })
+    page = capture_moments.app.test_client().get('/aws/show-photographers').data.decode()
+    assert f'src="/media/{blob}"' in page
+    assert 'src="https://example.com/john.jpg"' in page
+    with capture_moments.app.test_request_context():
+        assert capture_moments.profile_image_url('old.jpg') == '/static/img/old.jpg'
+
+def test_dashboard_analytics_cover_every_owned_profile(capture_moments, client):
+    import deploy_aws
+    legacy_id = f"photo_{client[1][8:16]}"
+    name = f"Legacy {legacy_id}"
+    capture_moments.photographers_table.put_item(Item={
+        'photographer_id': legacy_id, 'Name': name, 'price_per_hour': Decimal('100')
+    })
+    browser, user_id = signup_and_login(capture_moments, 'photographer', username=name)
+    deploy_aws.link_photographers_to_users(capture_moments.app.config['AWS_REGION'])
+
+    _, client_id = client
+    for photographer_id, time in ((legacy_id, '09:00'), (user_id, '13:00')):
+        booking_id = pending_booking(capture_moments, client_id, photographer_id, time=time)
+        browser.post(f"/booking/{booking_id}/accept")
+    analytics = capture_moments.get_booking_analytics(legacy_id, user_id)
+    assert analytics['bookings_by_status'] == {'accepted': 2}
+    assert analytics['revenue'] == 400
+    assert [(c['bookings'], c['revenue']) for c in analytics['top_clients']] == [(2, 400.0)]
+    assert b'$400.00' in browser.get('/dashboard/photographer').data
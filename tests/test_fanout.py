@@ -0,0 +1,21 @@
+"""Parallel backend calls within one request"""
+
+import threading
+import time
+
+def test_fanout_is_bounded_per_request(capture_moments, monkeypatch):
+    monkeypatch.setitem(capture_moments.app.config, 'FANOUT_PER_REQUEST', 2)
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def call(n):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return n
+
+    assert capture_moments.run_concurrently(*[lambda n=n: call(n) for n in range(6)]) == list(range(6))
+    assert peak[0] == 2
@@ -0,0 +1,188 @@
+"""Booking expiry and archival"""
+
+import json
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import text
+
+from test_dynamodb import BOOKING_DATE, pending_booking
+
+def test_stale_pending_booking_expires_like_sqlite(capture_moments, photographer, client):
+    import maintenance
+    browser, photographer_id = photographer
+    _, client_id = client
+    booking_id = pending_booking(capture_moments, client_id, photographer_id)
+    answered_id = pending_booking(capture_moments, client_id, photographer_id, time='15:00', duration=1)
+    browser.post(f"/booking/{answered_id}/accept")
+    later = datetime.utcnow() + timedelta(days=capture_moments.app.config['PENDING_EXPIRY_DAYS'] + 1)
+
+    with capture_moments.app.app_context():
+        assert maintenance.expire_stale_pending_in_dynamodb(later) >= 1
+        outbox = capture_moments.OutboxMessage.query.filter_by(dedupe_key=f"booking:{booking_id}:expired:client").all()
+    assert len(outbox) == 1
+
+    item = capture_moments.bookings_table.get_item(Key={'booking_id': booking_id})['Item']
+    assert item['status'] == 'expired'
+    answered = capture_moments.bookings_table.get_item(Key={'booking_id': answered_id})['Item']
+    assert answered['status'] == 'accepted'
+    bitmaps = capture_moments.get_day_bitmaps(date.fromisoformat(BOOKING_DATE))
+    assert bitmaps[photographer_id] == 1 << 15
+    assert capture_moments.get_booking_analytics(photographer_id)['bookings_by_status'] == {'expired': 1, 'accepted': 1}
+
+def test_expiry_migration_stamps_only_unstamped_bookings(capture_moments):
+    import deploy_aws
+    capture_moments.bookings_table.put_item(Item={'booking_id': 'legacy-ttl', 'date': '2031-03-04'})
+    deploy_aws.stamp_booking_expiry(capture_moments.app.config['AWS_REGION'])
+
+    item = capture_moments.bookings_table.get_item(Key={'booking_id': 'legacy-ttl'})['Item']
+    assert item['expires_at'] == capture_moments.dynamodb_expires_at(date(2031, 3, 4))
+    assert deploy_aws.stamp_booking_expiry(capture_moments.app.config['AWS_REGION']) == 0
+
+def test_old_dynamodb_bookings_are_archived_before_ttl(capture_moments, photographer, client):
+    import maintenance
+    _, photographer_id = photographer
+    _, client_id = client
+    now = datetime.utcnow()
+    old_date = (now - timedelta(days=capture_moments.app.config['BOOKING_ARCHIVE_DAYS'] + 3)).date()
+    booking_id = capture_moments.save_booking_to_dynamodb(client_id, photographer_id, old_date.isoformat(),
+                                                          '11:00', 2, 'accepted', 120)
+    recent_id = capture_moments.save_booking_to_dynamodb(client_id, photographer_id, BOOKING_DATE,
+                                                         '11:00', 2, 'accepted', 120)
+
+    with capture_moments.app.app_context():
+        assert maintenance.archive_old_bookings_in_dynamodb(now) == 1
+    assert 'Item' not in capture_moments.bookings_table.get_item(Key={'booking_id': booking_id})
+    assert 'Item' in capture_moments.bookings_table.get_item(Key={'booking_id': recent_id})
+
+    records = maintenance.query_archive(photographer_id=photographer_id)
+    assert [(r['id'], r['date'], r['duration'], r['price_per_hour']) for r in records] == \
+        [(booking_id, old_date.isoformat(), 2, 120.0)]
+    month = old_date.strftime('%Y-%m')
+    assert maintenance.query_archive(user_id=client_id, start_month=month, end_month=month) == records
+
+def test_backfill_counts_archived_bookings(capture_moments, tmp_path):
+    import backfill_rollups
+    import maintenance
+    maintenance.archive_store.write('2020-01', [
+        {'id': 'archived-1', 'photographer_id': 'p-archived', 'user_id': 'u-1', 'date': '2020-01-05',
+         'time': '10:00', 'duration': 2, 'status': 'accepted', 'price_per_hour': 50.0},
+        {'id': 'still-hot', 'photographer_id': 'p-archived', 'user_id': 'u-1', 'date': '2020-01-06',
+         'time': '10:00', 'duration': 1, 'status': 'accepted', 'price_per_hour': 50.0}
+    ])
+    export = tmp_path / 'bookings.jsonl'
+    export.write_text('{"booking_id": "still-hot", "photographer_id": "p-archived", "user_id": "u-1", '
+                      '"date": "2020-01-06", "status": "accepted", "duration": 1, "price_per_hour": 50}\n')
+
+    with capture_moments.app.app_context():
+        with backfill_rollups.load_export(str(export)).connect() as connection:
+            _, by_status, _ = backfill_rollups.aggregate(connection, 'SELECT * FROM bookings')
+    totals = [dict(r) for r in by_status if r['photographer_id'] == 'p-archived']
+    assert totals == [{'photographer_id': 'p-archived', 'status': 'accepted', 'bookings': 2, 'hours': 3,
+                       'revenue': 150.0}]
+
+def add_booking(capture_moments, photographer_id, user_id, booking_date, status='accepted'):
+    booking = capture_moments.Booking(user_id=user_id, photographer_id=photographer_id, date=booking_date,
+                                      time=time(10), duration=2, status=status, price_per_hour=100.0)
+    capture_moments.db.session.add(booking)
+    capture_moments.db.session.commit()
+    return booking.id
+
+def test_reused_booking_ids_keep_their_archived_history(sqlite_mode, sqlite_photographer):
+    import backfill_rollups
+    import maintenance
+    from conftest import signup_and_login
+    _, photographer_id = sqlite_photographer
+    _, client_id = signup_and_login(sqlite_mode, 'client')
+    now = datetime.utcnow()
+    old_date = (now - timedelta(days=sqlite_mode.app.config['BOOKING_ARCHIVE_DAYS'] + 3)).date()
+
+    with sqlite_mode.app.app_context():
+        first_id = add_booking(sqlite_mode, photographer_id, client_id, old_date)
+        assert maintenance.archive_old_bookings(now) >= 1
+        # SQLite hands the archived row's id to the next booking
+        assert add_booking(sqlite_mode, photographer_id, client_id, old_date) == first_id
+        assert maintenance.archive_old_bookings(now) >= 1
+        assert add_booking(sqlite_mode, photographer_id, client_id, now.date()) == first_id
+
+        records = maintenance.query_archive(photographer_id=photographer_id)
+        assert [r['id'] for r in records] == [first_id, first_id]
+
+        backfill_rollups.create_booking_table(sqlite_mode.db.session, 'archived_booking', temporary=True)
+        backfill_rollups.insert_bookings(sqlite_mode.db.session, 'archived_booking', maintenance.query_archive())
+        _, by_status, _ = backfill_rollups.aggregate(sqlite_mode.db.session, backfill_rollups.SQLITE_SOURCE)
+        sqlite_mode.db.session.execute(text('DROP TABLE archived_booking'))
+    totals = [dict(r) for r in by_status if r['photographer_id'] == str(photographer_id)]
+    assert totals == [{'photographer_id': str(photographer_id), 'status': 'accepted', 'bookings': 3, 'hours': 6,
+                       'revenue': 600.0}]
+
+def test_outbox_is_pruned_in_dynamodb_mode(capture_moments):
+    import maintenance
+    old = datetime.utcnow() - timedelta(days=maintenance.OUTBOX_RETENTION_DAYS + 1)
+    with capture_moments.app.app_context():
+        for key, status in (('prune:sent', 'sent'), ('prune:pending', 'pending')):
+            capture_moments.db.session.add(capture_moments.OutboxMessage(
+                dedupe_key=key, recipient='a@example.com', subject='s', body='b', status=status, created_at=old))
+        capture_moments.db.session.commit()
+        maintenance.run_maintenance()
+        remaining = {m.dedupe_key for m in capture_moments.OutboxMessage.query.filter(
+            capture_moments.OutboxMessage.dedupe_key.like('prune:%'))}
+    assert remaining == {'prune:pending'}
+
+def test_sqlite_archive_commits_in_batches(sqlite_mode, sqlite_photographer, monkeypatch):
+    import maintenance
+    from conftest import signup_and_login
+    _, photographer_id = sqlite_photographer
+    _, client_id = signup_and_login(sqlite_mode, 'client')
+    monkeypatch.setattr(maintenance, 'ARCHIVE_BATCH_SIZE', 2)
+    writes = []
+    write = maintenance.archive_store.write
+    monkeypatch.setattr(maintenance.archive_store, 'write',
+                        lambda month, records: writes.append(len(records)) or write(month, records))
+    now = datetime.utcnow()
+    old_date = (now - timedelta(days=sqlite_mode.app.config['BOOKING_ARCHIVE_DAYS'] + 3)).date()
+
+    with sqlite_mode.app.app_context():
+        for _ in range(3):
+            add_booking(sqlite_mode, photographer_id, client_id, old_date)
+        assert maintenance.archive_old_bookings(now) == 3
+        assert sqlite_mode.Booking.query.filter_by(photographer_id=photographer_id).count() == 0
+    assert writes == [2, 1]
+
+def test_backfill_scans_dynamodb_bookings(capture_moments, photographer, client, monkeypatch):
+    import backfill_rollups
+    _, photographer_id = photographer
+    _, client_id = client
+    capture_moments.save_booking_to_dynamodb(client_id, photographer_id, BOOKING_DATE, '11:00', 3, 'confirmed', 80)
+    monkeypatch.setattr('sys.argv', ['backfill_rollups.py'])
+    backfill_rollups.main()
+
+    item = capture_moments.booking_stats_table.get_item(
+        Key={'photographer_id': photographer_id, 'stat_key': 'status#confirmed'})['Item']
+    assert (item['bookings'], item['hours'], item['revenue']) == (1, 3, 240)
+
+def test_backfill_prices_unrated_bookings_like_incremental_updates(capture_moments, photographer, client, tmp_path):
+    import backfill_rollups
+    browser, photographer_id = photographer
+    _, client_id = client
+    browser.post('/edit_profile', data={'name': 'Rated', 'specialty': '', 'location': '', 'price_per_hour': '80',
+                                        'bio': ''})
+    record = {'booking_id': f"unrated-{photographer_id}", 'photographer_id': photographer_id, 'user_id': client_id,
+              'date': BOOKING_DATE, 'status': 'accepted', 'duration': 2}
+    export = tmp_path / 'bookings.jsonl'
+    export.write_text(json.dumps(record) + '\n')
+
+    with capture_moments.app.app_context():
+        with backfill_rollups.load_export(str(export)).connect() as connection:
+            _, by_status, _ = backfill_rollups.aggregate(connection, 'SELECT * FROM bookings')
+    assert [r['revenue'] for r in by_status if r['photographer_id'] == photographer_id] == \
+        [capture_moments.dynamodb_booking_revenue(record)] == [160.0]
+
+def test_backfill_removes_stale_dynamodb_stats(capture_moments, photographer, monkeypatch):
+    import backfill_rollups
+    _, photographer_id = photographer
+    stale = {'photographer_id': photographer_id, 'stat_key': 'day#2030-01-07#pending'}
+    capture_moments.booking_stats_table.put_item(Item=dict(stale, bookings=1, hours=2, revenue=200))
+    monkeypatch.setattr('sys.argv', ['backfill_rollups.py'])
+    backfill_rollups.main()
+
+    assert 'Item' not in capture_moments.booking_stats_table.get_item(Key=stale)
@@ -0,0 +1,85 @@
+"""Notification outbox and delivery worker in SQLite mode"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import signup_and_login
+
+@pytest.fixture
+def outbox(sqlite_mode):
+    """An empty outbox, inside an app context"""
+    with sqlite_mode.app.app_context():
+        sqlite_mode.OutboxMessage.query.delete()
+        sqlite_mode.db.session.commit()
+        yield sqlite_mode.OutboxMessage
+
+def queue(capture_moments, key, **kwargs):
+    message = capture_moments.OutboxMessage(dedupe_key=key, recipient='a@example.com', subject='Hi', body='Body',
+                                            **kwargs)
+    capture_moments.db.session.add(message)
+    capture_moments.db.session.commit()
+    return message.id
+
+class FailingSender:
+    def send(self, message):
+        raise OSError('mail server down')
+
+def test_booking_is_delivered_once(sqlite_mode, sqlite_photographer, outbox, tmp_path):
+    import notification_worker
+    _, photographer_id = sqlite_photographer
+    browser, _ = signup_and_login(sqlite_mode, 'client')
+    browser.post(f"/booking/{photographer_id}", data={'date': '2030-03-04', 'time': '10:00', 'duration': '1'})
+    booking = sqlite_mode.Booking.query.filter_by(photographer_id=photographer_id).one()
+    keys = [f"booking:{booking.id}:created:photographer", f"booking:{booking.id}:created:client"]
+    sqlite_mode.enqueue_notification(keys[1], 'c@example.com', 'Again', 'Again')
+    sqlite_mode.db.session.commit()
+    assert sorted(m.dedupe_key for m in outbox.query) == sorted(keys)
+
+    sender = notification_worker.FileSender(str(tmp_path / 'outbox.jsonl'))
+    assert notification_worker.drain_once(sender) == 2
+    assert notification_worker.drain_once(sender) == 0
+    lines = [json.loads(line) for line in (tmp_path / 'outbox.jsonl').read_text().splitlines()]
+    assert sorted(line['dedupe_key'] for line in lines) == sorted(keys)
+    assert {m.status for m in outbox.query} == {'sent'}
+
+def test_claim_batch_leases_due_messages(sqlite_mode, outbox):
+    import notification_worker
+    now = datetime.utcnow()
+    due = queue(sqlite_mode, 'claim:due', next_attempt_at=now - timedelta(seconds=1))
+    queue(sqlite_mode, 'claim:later', next_attempt_at=now + timedelta(hours=1))
+
+    assert [m.id for m in notification_worker.claim_batch(now)] == [due]
+    message = sqlite_mode.db.session.get(outbox, due)
+    assert message.attempts == 1
+    assert message.next_attempt_at == now + timedelta(seconds=notification_worker.LEASE_SECONDS)
+    # Leased to the first worker, so a second one finds nothing due
+    assert notification_worker.claim_batch(now) == []
+
+def test_failed_delivery_backs_off_then_gives_up(sqlite_mode, outbox, monkeypatch):
+    import notification_worker
+    monkeypatch.setattr(notification_worker, 'MAX_ATTEMPTS', 2)
+    message_id = queue(sqlite_mode, 'retry:me', next_attempt_at=datetime.utcnow() - timedelta(seconds=1))
+
+    before = datetime.utcnow()
+    assert notification_worker.drain_once(FailingSender()) == 1
+    message = sqlite_mode.db.session.get(outbox, message_id)
+    assert (message.status, message.attempts, message.last_error) == ('pending', 1, 'mail server down')
+    assert before + timedelta(seconds=30) <= message.next_attempt_at <= datetime.utcnow() + timedelta(seconds=30)
+    assert notification_worker.drain_once(FailingSender()) == 0
+
+    message.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    sqlite_mode.db.session.commit()
+    assert notification_worker.drain_once(FailingSender()) == 1
+    assert (message.status, message.attempts) == ('failed', 2)
+
+def test_file_sender_skips_keys_already_written(sqlite_mode, outbox, tmp_path):
+    import notification_worker
+    path = str(tmp_path / 'mail' / 'outbox.jsonl')
+    message = sqlite_mode.db.session.get(outbox, queue(sqlite_mode, 'file:once'))
+    notification_worker.FileSender(path).send(message)
+    sender = notification_worker.FileSender(path)
+    sender.send(message)
+    sender.send(message)
+    assert len(open(path).read().splitlines()) == 1
@@ -0,0 +1,42 @@
+"""Sampling profiler middleware"""
+
+import os
+import pstats
+
+from werkzeug.test import Client
+
+from profiling import SamplingProfilerMiddleware
+
+def profiled(capture_moments, tmp_path, **kwargs):
+    middleware = SamplingProfilerMiddleware(capture_moments.app.wsgi_app, capture_moments.app.url_map,
+                                            str(tmp_path), **kwargs)
+    return middleware, Client(middleware)
+
+def test_route_and_token_selection(sqlite_mode, tmp_path):
+    middleware, browser = profiled(sqlite_mode, tmp_path, routes=['about'], token='secret')
+    assert browser.get('/about').status_code == 200
+    browser.get('/photographers')
+    browser.get('/photographers', headers={'X-Profile': 'wrong'})
+    browser.get('/', headers={'X-Profile': 'secret'})
+    assert middleware.counts == {'about': 1, 'home': 1}
+
+def test_sample_rate(sqlite_mode, tmp_path, monkeypatch):
+    import profiling
+    middleware, browser = profiled(sqlite_mode, tmp_path, sample_rate=0.25)
+    for draw in (0.1, 0.5, 0.2, 0.9):
+        monkeypatch.setattr(profiling.random, 'random', lambda: draw)
+        browser.get('/about')
+    assert middleware.counts == {'about': 2}
+
+def test_stats_are_dumped_per_endpoint(sqlite_mode, tmp_path):
+    middleware, browser = profiled(sqlite_mode, tmp_path, routes=['about', 'show_photographers'], dump_every=2)
+    path = tmp_path / f"about.{os.getpid()}.pstats"
+    browser.get('/about')
+    assert not path.exists()
+    browser.get('/about')
+    assert 'about' in {f[2] for f in pstats.Stats(str(path)).stats}
+
+    browser.get('/photographers')
+    assert sorted(os.listdir(tmp_path)) == [path.name]
+    middleware.dump_all()
+    assert sorted(os.listdir(tmp_path)) == sorted([path.name, f"show_photographers.{os.getpid()}.pstats"])